@@ -0,0 +1,76 @@
+"""
+Attachment Upload API Endpoints
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.database import get_db
+from app.core.dependencies import get_current_user
+from app.config import settings
+from app.core.attachment_store import attachment_store
+from app.core.attachment_limits import format_size
+from app.crud.attachment_crud import AttachmentCRUD
+from app.crud.email_crud import EmailLogCRUD
+from app.schemas.attachment import AttachmentResponse
+from app.models.user import User
+
+router = APIRouter()
+
+def store_upload(db: Session, user_id: int, upload: UploadFile, max_bytes: int):
+    """Stream an upload into the content-addressed store and register it for the user"""
+    sha256, size = attachment_store.save_stream(upload.file, max_bytes=max_bytes)
+    return AttachmentCRUD.create(
+        db,
+        user_id=user_id,
+        sha256=sha256,
+        filename=(upload.filename or "attachment").replace('\n', '').replace('\r', ''),
+        content_type=upload.content_type or "application/octet-stream",
+        size_bytes=size
+    )
+
+@router.post("/", response_model=AttachmentResponse)
+def upload_attachment(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Upload a file once and reference its id from /emails/send (attachment_ids)
+    """
+    try:
+        return store_upload(db, current_user.id, file, max_bytes=settings.MAX_ATTACHMENT_SIZE)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Attachment exceeds {format_size(settings.MAX_ATTACHMENT_SIZE)} limit"
+        )
+
+@router.get("/", response_model=List[AttachmentResponse])
+def list_attachments(
+    skip: int = 0,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return AttachmentCRUD.list_user_attachments(db, current_user.id, skip, limit)
+
+@router.delete("/{attachment_id}")
+def delete_attachment(
+    attachment_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    sha256 = AttachmentCRUD.delete(db, current_user.id, attachment_id)
+    if sha256 is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found"
+        )
+    
+    # Campaigns still queued may reference the content - only drop the blob if nothing does
+    if sha256:
+        if not EmailLogCRUD.has_pending_campaign_with_attachment(db, sha256):
+            attachment_store.delete(sha256)
+    
+    return {"message": "Attachment deleted successfully"}
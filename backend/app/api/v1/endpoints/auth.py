@@ -7,7 +7,7 @@ from typing import Annotated
 from app.database import get_db
 from app.crud.user import authenticate_user, create_user, get_user_by_id
 from app.schemas.user import UserCreate, UserLogin, Token, UserResponse
-from app.core.security import create_access_token
+from app.core.security import create_access_token, HashingBusyError
 from app.config import settings
 
 router = APIRouter()
@@ -43,6 +43,8 @@ def signup(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HashingBusyError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
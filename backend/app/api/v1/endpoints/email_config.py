@@ -2,17 +2,18 @@
 Email Configuration API Endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.database import get_db
-from app.core.dependencies import get_current_user
+from app.database import get_db, get_async_db
+from app.core.dependencies import get_current_user, get_current_user_async
 from app.schemas.email_config import (
     EmailConfigCreate, EmailConfigResponse, 
     EmailConfigUpdate, EmailTestRequest, EmailTestResponse
 )
 from app.crud.email_crud import EmailConfigCRUD
-from app.core.smtp_client import SMTPClient
+from app.core.async_smtp_client import AsyncSMTPClient
 from app.models.user import User
 
 router = APIRouter()
@@ -70,16 +71,22 @@ def get_email_config(
     return config
 
 @router.post("/test", response_model=EmailTestResponse)
-def test_email_config(
+async def test_email_config(
     test_request: EmailTestRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Test email configuration by sending a test email
     """
-    # Get user's email config
-    config = EmailConfigCRUD.get_config(db, current_user.id)
+    # Get user's email config (with decrypted password, cached per process)
+    try:
+        config = await db.run_sync(EmailConfigCRUD.get_smtp_settings, current_user.id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not decrypt password"
+        )
     
     if not config:
         raise HTTPException(
@@ -88,27 +95,11 @@ def test_email_config(
         )
     
     try:
-        # Get decrypted password
-        from app.crud.email_crud import EmailConfigCRUD
-        password = EmailConfigCRUD.get_decrypted_password(db, current_user.id, config.email_provider)
-        
-        if not password:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Could not decrypt password"
-            )
-        
         # Send test email
-        smtp_client = SMTPClient(
-            smtp_host=config.smtp_host or "smtp.gmail.com",
-            smtp_port=config.smtp_port or 587,
-            username=config.email_address,
-            password=password,
-            use_tls=config.use_tls if hasattr(config, 'use_tls') else True
-        )
+        smtp_client = AsyncSMTPClient.from_config(config)
         
-        message_id = smtp_client.send_email(
-            to_email=test_request.test_recipient,
+        message_id = await smtp_client.send_email(
+            to_email=[test_request.test_recipient],
             subject="Test Email from Premium Email App",
             body="This is a test email to verify your email configuration is working correctly.",
             is_html=False
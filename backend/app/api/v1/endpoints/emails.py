@@ -1,186 +1,506 @@
 """
 Email Sending API Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Form, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional, Tuple
 import json
+import logging
 
-from app.database import get_db
-from app.core.dependencies import get_current_user
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal, get_db, get_async_db
+from app.core.dependencies import get_current_user, get_current_user_async
+from app.core.progress import progress_hub
+from app.core.rate_limit import provider_profile
+from app.core.recipients import CleanRecipients, address_key, clean_recipients
+from app.core.scheduler import due_times
+from app.core.templating import compile_template, missing_variables
+from app.core.attachment_limits import (
+    AttachmentLimits, limits_for_provider, base64_decoded_size, format_size
+)
 from app.schemas.email import (
     EmailSendRequest, EmailSendResponse, 
-    EmailLogResponse, EmailRecipient, EmailAttachment
+    EmailLogResponse, EmailRecipient, EmailAttachment, EmailDeliveryResponse
+)
+from app.crud.email_crud import (
+    EmailConfigCRUD, EmailLogCRUD, EmailDeliveryCRUD, UNSETTLED_STATUSES, recipients_summary
 )
-from app.crud.email_crud import EmailConfigCRUD, EmailLogCRUD
-from app.core.smtp_client import SMTPClient
+from app.crud.attachment_crud import AttachmentCRUD
+from app.crud.suppression_crud import SuppressionCRUD
+from app.crud.recipient_list_crud import RecipientListCRUD
+from app.api.v1.endpoints.attachments import store_upload
 from app.models.user import User
+from app.models.recipient_list import RecipientList
+from app.utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter()
 
-def send_email_background(
-    db: Session,
-    user_id: int,
-    email_request: EmailSendRequest,
-    email_log_id: int
-):
-    try:
-        config = EmailConfigCRUD.get_config(db, user_id)
-        
-        if not config:
-            EmailLogCRUD.update_log_status(db, email_log_id, "failed")
-            return
-        
-        password = EmailConfigCRUD.get_decrypted_password(db, user_id, config.email_provider)
-        
-        if not password:
-            EmailLogCRUD.update_log_status(db, email_log_id, "failed")
-            return
-        
-        smtp_client = SMTPClient(
-            smtp_host=config.smtp_host or "smtp.gmail.com",
-            smtp_port=config.smtp_port or 587,
-            username=config.email_address,
-            password=password,
-            use_tls=getattr(config, 'use_tls', True)
-        )
-        
-        attachments_list = []
-        if email_request.attachments and len(email_request.attachments) > 0:
-            print(f"Converting {len(email_request.attachments)} attachments to dict format...")
-            for idx, att in enumerate(email_request.attachments):
-                size = getattr(att, 'size_in_bytes', None) or getattr(att, 'size', 0)
-                attachments_list.append({
-                    'filename': att.filename,
-                    'content_type': att.content_type,
-                    'base64_content': att.base64_content,
-                    'size_in_bytes': size,
-                })
-                print(f"   {idx+1}. {att.filename} ({att.content_type}, {size} bytes)")
-        else:
-            print(f"   No attachments to send")
-        
-        all_recipients = email_request.recipients.to.copy()
-        failed_recipients = []
-        successful_recipients = []
-        
-        for recipient in email_request.recipients.to:
-            try:
-                print(f"Sending to: {recipient}")
-                print(f"   Subject: {email_request.subject}")
-                print(f"   Body: {email_request.body[:50]}...")
-                print(f"   Attachments: {len(attachments_list)}")
-                
-                message_id = smtp_client.send_email(
-                    to_email=[recipient],
-                    cc_email=[],
-                    bcc_email=[],
-                    subject=email_request.subject,
-                    body=email_request.body,
-                    is_html=email_request.is_html,
-                    attachments=attachments_list
-                )
-                
-                successful_recipients.append(recipient)
-                print(f"Email sent successfully to: {recipient}")
-                
-            except Exception as e:
-                failed_recipients.append(recipient)
-                print(f"Failed to send to {recipient}: {str(e)}")
-                import traceback
-                traceback.print_exc()
-        
-        if successful_recipients:
-            if failed_recipients:
-                EmailLogCRUD.update_log_status(db, email_log_id, "partial", f"Sent to {len(successful_recipients)} recipients")
-                print(f"Partial success: {len(successful_recipients)}/{len(all_recipients)} sent")
-            else:
-                EmailLogCRUD.update_log_status(db, email_log_id, "success", f"Sent to {len(successful_recipients)} recipients")
-                print(f"All emails sent successfully!")
-        else:
-            EmailLogCRUD.update_log_status(db, email_log_id, "failed", "Failed to send to all recipients")
-            print(f"All emails failed")
-        
-    except Exception as e:
-        EmailLogCRUD.update_log_status(db, email_log_id, "failed", str(e))
-        print(f"Error in send_email_background: {str(e)}")
-        import traceback
-        traceback.print_exc()
+logger = logging.getLogger(__name__)
 
-@router.post("/send", response_model=EmailSendResponse)
-def send_email(
-    email_request: EmailSendRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    config = EmailConfigCRUD.get_config(db, current_user.id)
+# 'to' addresses of a recipient list shown in the campaign's recipients summary
+RECIPIENT_LIST_PREVIEW = 50
+
+def _get_sender_config(db: Session, user_id: int):
+    try:
+        config = EmailConfigCRUD.get_smtp_settings(db, user_id)
+    except ValueError:
+        config = None
     
     if not config:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email configuration not found. Please setup first."
         )
+    return config
+
+def _stored_attachments(db: Session, user_id: int, attachment_ids: Optional[List[int]]) -> List[dict]:
+    """Campaign payload entries for previously uploaded attachments (by handle, not content)"""
+    if not attachment_ids:
+        return []
     
-    if not email_request.recipients.to:
+    attachments = AttachmentCRUD.get_user_attachments(db, user_id, attachment_ids)
+    if len(attachments) != len(attachment_ids):
+        found = {attachment.id for attachment in attachments}
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="At least one 'to' recipient is required"
+            detail=f"Unknown attachment ids: {[i for i in attachment_ids if i not in found]}"
         )
     
-    print(f"Email request from user {current_user.id} ({config.email_address})")
-    print(f"   To recipients: {email_request.recipients.to}")
-    print(f"   Subject: {email_request.subject}")
-    print(f"   Body length: {len(email_request.body)} chars")
-    print(f"   Attachments: {len(email_request.attachments) if email_request.attachments else 0}")
-    
-    if email_request.attachments:
-        total_size = 0
-        for idx, att in enumerate(email_request.attachments):
-            size = getattr(att, 'size_in_bytes', None) or getattr(att, 'size', 0)
-            print(f"   {idx+1}. {att.filename} - {att.content_type} - {size} bytes")
-            total_size += size
-        
-        print(f"   Total attachment size: {total_size/1024:.1f} KB")
-        
-        if total_size > 25 * 1024 * 1024:
+    return [
+        {
+            'filename': attachment.filename,
+            'content_type': attachment.content_type,
+            'handle': attachment.sha256,
+            'size_in_bytes': attachment.size_bytes,
+        }
+        for attachment in attachments
+    ]
+
+def _check_attachment_sizes(sizes: List[tuple], limits: AttachmentLimits):
+    """Raise 413 if any (filename, size) or their sum is over the sender's limits"""
+    total_size = 0
+    for filename, size in sizes:
+        if size > limits.per_attachment:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Attachment {filename} ({format_size(size)}) exceeds {format_size(limits.per_attachment)} limit"
+            )
+        total_size += size
+    
+    if total_size > limits.total:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Total attachment size {format_size(total_size)} exceeds {format_size(limits.total)} limit"
+        )
+    return total_size
+
+def _template_variables(email_request: EmailSendRequest, to: List[str]) -> Optional[List[dict]]:
+    """
+    Per-recipient template variables aligned with `to`, or None for a plain
+    campaign. Raises 400 if a recipient lacks a variable the templates use.
+    """
+    if email_request.recipient_data is None:
+        return None
+    
+    # Compiled once here and cached by content hash for the workers' renders
+    used = compile_template(email_request.subject).variables | compile_template(email_request.body).variables
+    data = {address_key(address): values for address, values in email_request.recipient_data.items()}
+    
+    variables = []
+    incomplete = []
+    for address in to:
+        values = data.get(address_key(address), {})
+        if missing_variables(used, values):
+            incomplete.append(address)
+        variables.append(values)
+    
+    if incomplete:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"recipient_data is missing template variables ({', '.join(sorted(used))}) "
+                   f"for {len(incomplete)} recipient(s), e.g. {', '.join(incomplete[:5])}"
+        )
+    return variables
+
+def _check_recipient_source(email_request: EmailSendRequest):
+    """Recipients come either from recipients.to (+ recipient_data) or from a recipient list"""
+    if email_request.recipient_list_id is not None:
+        if email_request.recipients.to or email_request.recipient_data is not None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Total attachment size {total_size/1024/1024:.1f}MB exceeds 25MB limit"
+                detail="recipient_list_id cannot be combined with 'to' recipients or recipient_data"
             )
+    elif not email_request.recipients.to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one 'to' recipient is required"
+        )
+    # Bulk sends go out as one message per recipient; copying each of them
+    # to the cc/bcc addresses would mail those once per recipient
+    bulk = email_request.recipient_list_id is not None or len(email_request.recipients.to) > 1
+    if bulk and (email_request.recipients.cc or email_request.recipients.bcc):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="cc/bcc need a single 'to' recipient; add the addresses as 'to' recipients to send them a copy"
+        )
+
+def _list_recipients(db: Session, user_id: int, email_request: EmailSendRequest,
+                     suppressed) -> Tuple[RecipientList, CleanRecipients, int, bool]:
+    """
+    The recipient list to send to, with `to` holding a preview of the list
+    for the log summary; how many entries will be queued; and whether the
+    templates use the list's columns.
+    """
+    recipient_list = RecipientListCRUD.get_user_list(db, user_id, email_request.recipient_list_id)
+    if not recipient_list:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipient list not found"
+        )
     
-    email_log = EmailLogCRUD.create_log(
+    used = compile_template(email_request.subject).variables | compile_template(email_request.body).variables
+    missing = used - set(json.loads(recipient_list.columns or "[]"))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Recipient list has no column for template variables: {', '.join(sorted(missing))}"
+        )
+    
+    list_suppressed = RecipientListCRUD.count_suppressed(db, user_id, recipient_list.id)
+    recipients = CleanRecipients(
+        to=[address for address in RecipientListCRUD.preview_addresses(db, recipient_list.id, RECIPIENT_LIST_PREVIEW)
+            if address_key(address) not in suppressed],
+        cc=[],
+        bcc=[],
+        duplicates=0,
+        suppressed=list_suppressed,
+    )
+    # Suppressed entries are skipped by the INSERT ... SELECT that queues the list
+    return recipient_list, recipients, recipient_list.row_count - list_suppressed, bool(used)
+
+def _send_time(email_request: EmailSendRequest) -> Optional[datetime]:
+    """send_at as naive UTC (how the queue stores times); None to send right away"""
+    send_at = email_request.send_at
+    if send_at is None:
+        return None
+    if send_at.tzinfo is not None:
+        send_at = send_at.astimezone(timezone.utc).replace(tzinfo=None)
+    now = datetime.utcnow()
+    if send_at <= now:
+        return None
+    if send_at > now + timedelta(days=settings.MAX_SCHEDULE_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"send_at can be at most {settings.MAX_SCHEDULE_DAYS} days ahead"
+        )
+    return send_at
+
+def _queue_campaign(db: Session, user_id: int, config, email_request: EmailSendRequest,
+                    attachments_list: List[dict]) -> EmailSendResponse:
+    """Persist the campaign and one queued delivery per recipient; app.worker sends them"""
+    send_at = _send_time(email_request)
+    suppressed = SuppressionCRUD.get_suppressed_set(db, user_id)
+    recipient_list = None
+    list_variables = False
+    variables = None
+    if email_request.recipient_list_id is not None:
+        recipient_list, recipients, to_count, list_variables = _list_recipients(
+            db, user_id, email_request, suppressed
+        )
+    else:
+        recipients = clean_recipients(
+            email_request.recipients.to,
+            email_request.recipients.cc,
+            email_request.recipients.bcc,
+            suppressed=suppressed
+        )
+        to_count = len(recipients.to)
+    
+    if not to_count:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Every 'to' recipient is a duplicate or on the suppression list"
+        )
+    
+    if recipient_list is None:
+        variables = _template_variables(email_request, recipients.to)
+    
+    # A single-recipient message also goes to every cc/bcc address
+    per_message = 1 + len(recipients.cc) + len(recipients.bcc)
+    max_per_message = provider_profile(config.email_provider).recipients_per_message
+    if per_message > max_per_message:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many cc/bcc recipients: {config.email_provider} accepts {max_per_message} recipients per message"
+        )
+    
+    email_log = EmailLogCRUD.create_campaign(
         db=db,
-        user_id=current_user.id,
-        recipients=json.dumps({
-            'to': email_request.recipients.to,
-            'cc': email_request.recipients.cc,
-            'bcc': email_request.recipients.bcc,
-            'total': len(email_request.recipients.to) + 
-                    len(email_request.recipients.cc) + 
-                    len(email_request.recipients.bcc)
-        }),
+        user_id=user_id,
+        sender_email=config.email_address,
+        recipients=recipients_summary(recipients.to, recipients.cc, recipients.bcc, to_count=to_count),
+        to=recipients.to,
         subject=email_request.subject,
-        status="pending"
+        body=email_request.body,
+        is_html=email_request.is_html,
+        attachments=attachments_list,
+        cc=recipients.cc,
+        bcc=recipients.bcc,
+        available_at=send_at,
+        variables=variables,
+        recipient_list_id=recipient_list.id if recipient_list is not None else None,
+        list_variables=list_variables
     )
     
-    background_tasks.add_task(
-        send_email_background,
-        db, current_user.id, email_request, email_log.id
-    )
+    # Committed: wake idle workers in this process (at send_at for scheduled campaigns)
+    due_times.add(send_at or datetime.utcnow())
+    
+    logger.info("Campaign queued", extra={
+        "campaign_id": email_log.id,
+        "send_at": send_at.isoformat() if send_at else None,
+        "user_id": user_id,
+        "recipients": to_count,
+        "recipient_list_id": email_request.recipient_list_id,
+        "duplicates": recipients.duplicates,
+        "suppressed": recipients.suppressed,
+        "templated": variables is not None or list_variables,
+        "attachments": len(attachments_list),
+        "attachment_bytes": sum(att.get('size_in_bytes', 0) for att in attachments_list),
+    })
+    
+    message = f"Email is queued to be sent individually to {to_count} recipient(s)"
+    if send_at is not None:
+        message = f"Email is scheduled for {send_at.isoformat(timespec='seconds')} UTC " \
+                  f"to be sent individually to {to_count} recipient(s)"
+    copies = len(recipients.cc) + len(recipients.bcc)
+    if copies:
+        message += f", copied to {copies} cc/bcc address(es)"
+    skipped = []
+    if recipients.duplicates:
+        skipped.append(f"{recipients.duplicates} duplicate(s)")
+    if recipients.suppressed:
+        skipped.append(f"{recipients.suppressed} suppressed address(es)")
+    if skipped:
+        message += f" (skipped {' and '.join(skipped)})"
     
     return EmailSendResponse(
         success=True,
-        message=f"Email is being sent individually to {len(email_request.recipients.to)} recipient(s)",
+        message=message,
         email_log_id=email_log.id
     )
 
-@router.get("/history", response_model=List[EmailLogResponse])
-def get_email_history(
-    skip: int = 0,
-    limit: int = 50,
+def _queue_campaign_in_new_session(user_id: int, config, email_request: EmailSendRequest,
+                                   attachments_list: List[dict]) -> EmailSendResponse:
+    """_queue_campaign on a sync session of its own, for calls from a threadpool thread"""
+    db = SessionLocal()
+    try:
+        return _queue_campaign(db, user_id, config, email_request, attachments_list)
+    finally:
+        db.close()
+
+def _inline_attachments(email_request: EmailSendRequest) -> List[dict]:
+    """
+    Campaign payload entries for the request's base64 attachments.
+    Sizes come from the base64 length - nothing is decoded in the request thread.
+    """
+    return [
+        {
+            'filename': att.filename,
+            'content_type': att.content_type,
+            'base64_content': att.base64_content,
+            'size_in_bytes': base64_decoded_size(att.base64_content),
+        }
+        for att in (email_request.attachments or [])
+    ]
+
+@router.post("/send", response_model=EmailSendResponse)
+async def send_email(
+    email_request: EmailSendRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    config = await db.run_sync(_get_sender_config, current_user.id)
+    
+    _check_recipient_source(email_request)
+    
+    stored_attachments = await db.run_sync(
+        _stored_attachments, current_user.id, email_request.attachment_ids
+    )
+    
+    attachments_list = _inline_attachments(email_request) + stored_attachments
+    _check_attachment_sizes(
+        [(att['filename'], att['size_in_bytes']) for att in attachments_list],
+        limits_for_provider(config.email_provider)
+    )
+    
+    # Cleaning and inserting thousands of recipients is CPU work that would
+    # stall the event loop under run_sync: queue on a threadpool thread
+    return await run_in_threadpool(
+        _queue_campaign_in_new_session, current_user.id, config, email_request, attachments_list
+    )
+
+@router.post("/send-multipart", response_model=EmailSendResponse)
+def send_email_multipart(
+    payload: str = Form(..., description="EmailSendRequest as JSON, attachments go in 'files'"),
+    files: List[UploadFile] = File(default=[]),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    logs = EmailLogCRUD.get_user_logs(db, current_user.id, skip, limit)
-    return logs
\ No newline at end of file
+    """
+    Send with attachments uploaded as multipart/form-data.
+    Files are streamed chunk by chunk into the attachment store and the
+    queued campaign only references them by handle, so request memory does
+    not grow with attachment size. Uploads are registered like
+    POST /attachments, so identical files are stored once.
+    """
+    try:
+        email_request = EmailSendRequest.model_validate_json(payload)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=json.loads(e.json())
+        )
+    
+    config = _get_sender_config(db, current_user.id)
+    
+    _check_recipient_source(email_request)
+    
+    limits = limits_for_provider(config.email_provider)
+    attachments_list = _inline_attachments(email_request) + \
+        _stored_attachments(db, current_user.id, email_request.attachment_ids)
+    total_size = _check_attachment_sizes(
+        [(att['filename'], att['size_in_bytes']) for att in attachments_list], limits
+    )
+    try:
+        for upload in files:
+            remaining = limits.total - total_size
+            if remaining <= 0:
+                raise ValueError("Attachment size limit reached")
+            attachment = store_upload(
+                db, current_user.id, upload, max_bytes=min(limits.per_attachment, remaining)
+            )
+            total_size += attachment.size_bytes
+            attachments_list.append({
+                'filename': attachment.filename,
+                'content_type': attachment.content_type,
+                'handle': attachment.sha256,
+                'size_in_bytes': attachment.size_bytes,
+            })
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Attachments exceed the {format_size(limits.per_attachment)} per file / "
+                   f"{format_size(limits.total)} total limit"
+        )
+    
+    return _queue_campaign(db, current_user.id, config, email_request, attachments_list)
+
+@router.get("/history", response_model=List[EmailLogResponse])
+async def get_email_history(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    position = None
+    if before:
+        position = decode_cursor(before)
+        if position is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+    
+    logs = await db.run_sync(EmailLogCRUD.get_user_logs, current_user.id, skip, limit, position)
+    
+    if len(logs) == limit and logs[-1].created_at is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(logs[-1].created_at, logs[-1].id)
+    return logs
+
+@router.get("/{email_log_id}/deliveries", response_model=List[EmailDeliveryResponse])
+async def get_email_deliveries(
+    email_log_id: int,
+    status_filter: Optional[str] = Query(None, alias="status", description="queued, sending, sent or failed"),
+    after_id: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Per-recipient delivery status for one of the user's campaigns
+    """
+    log = await db.run_sync(EmailLogCRUD.get_user_log, current_user.id, email_log_id)
+    if not log:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Email log not found"
+        )
+    
+    return await db.run_sync(
+        EmailDeliveryCRUD.get_campaign_deliveries, email_log_id, status_filter, after_id, limit
+    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _read_progress(email_log_id: int) -> dict:
+    # Short-lived session per read: a stream must not hold a pooled connection
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(EmailDeliveryCRUD.campaign_progress, email_log_id)
+
+async def _progress_events(email_log_id: int) -> AsyncIterator[str]:
+    # Subscribe before the first read so no event falls in between
+    subscription = progress_hub.subscribe(email_log_id)
+    try:
+        progress = await _read_progress(email_log_id)
+        yield _sse("progress", progress)
+        while progress["status"] in UNSETTLED_STATUSES:
+            event = await subscription.get(settings.PROGRESS_POLL_INTERVAL)
+            if event is not None and event["type"] == "delivery":
+                yield _sse("delivery", event)
+                continue
+            # Finished, idle (the sending worker may be another process) or
+            # events were dropped: the database has the truth
+            latest = await _read_progress(email_log_id)
+            if latest != progress:
+                progress = latest
+                yield _sse("progress", progress)
+            else:
+                yield ": keep-alive\n\n"
+        yield _sse("done", progress)
+    finally:
+        progress_hub.unsubscribe(subscription)
+
+@router.get("/{email_log_id}/events")
+async def stream_email_progress(
+    email_log_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Server-sent events with the live progress of one of the user's campaigns:
+    `progress` (status and delivery counts) first and whenever they change,
+    `delivery` per recipient outcome (sent, failed, retrying, deferred), and
+    a final `done` once the campaign has settled; then the stream ends.
+    Replaces polling /history.
+    """
+    log = await db.run_sync(EmailLogCRUD.get_user_log, current_user.id, email_log_id)
+    if not log:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Email log not found"
+        )
+    await db.close()
+    
+    return StreamingResponse(
+        _progress_events(email_log_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,73 @@
+"""
+Recipient List API Endpoints
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, File, Form, UploadFile
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.database import get_db
+from app.core.dependencies import get_current_user
+from app.core.recipient_import import RecipientImportError, parse_recipient_csv
+from app.crud.recipient_list_crud import RecipientListCRUD
+from app.schemas.recipient_list import RecipientListResponse
+from app.models.user import User
+
+router = APIRouter()
+
+@router.post("/", response_model=RecipientListResponse)
+def import_recipient_list(
+    file: UploadFile = File(..., description="CSV with an 'email' column; other columns become template variables"),
+    name: str = Form(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import a CSV as a reusable recipient list and send to it with
+    recipient_list_id. The file is parsed as a stream and validated in
+    batches; invalid and repeated addresses are skipped and counted.
+    """
+    list_name = (name or file.filename or "Recipients").strip()[:255]
+    try:
+        columns, batches = parse_recipient_csv(file.file)
+        return RecipientListCRUD.import_entries(db, current_user.id, list_name, columns, batches)
+    except RecipientImportError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/", response_model=List[RecipientListResponse])
+def list_recipient_lists(
+    skip: int = 0,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return RecipientListCRUD.list_user_lists(db, current_user.id, skip, limit)
+
+@router.get("/{list_id}", response_model=RecipientListResponse)
+def get_recipient_list(
+    list_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    recipient_list = RecipientListCRUD.get_user_list(db, current_user.id, list_id)
+    if not recipient_list:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipient list not found"
+        )
+    return recipient_list
+
+@router.delete("/{list_id}")
+def delete_recipient_list(
+    list_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not RecipientListCRUD.delete(db, current_user.id, list_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipient list not found"
+        )
+    return {"message": "Recipient list deleted successfully"}
@@ -0,0 +1,48 @@
+"""
+Suppression List API Endpoints
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.database import get_db
+from app.core.dependencies import get_current_user
+from app.crud.suppression_crud import SuppressionCRUD
+from app.schemas.suppression import SuppressionCreate, SuppressionResponse
+from app.models.user import User
+
+router = APIRouter()
+
+@router.post("/")
+def add_suppressions(
+    request: SuppressionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Never send to these addresses again (hard bounces are added automatically)
+    """
+    added = SuppressionCRUD.add(db, current_user.id, request.addresses)
+    return {"message": f"{added} address(es) suppressed", "added": added}
+
+@router.get("/", response_model=List[SuppressionResponse])
+def list_suppressions(
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return SuppressionCRUD.list_user_suppressions(db, current_user.id, skip, limit)
+
+@router.delete("/{address}")
+def delete_suppression(
+    address: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not SuppressionCRUD.remove(db, current_user.id, address):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Address is not suppressed"
+        )
+    return {"message": "Address removed from the suppression list"}
@@ -4,18 +4,106 @@ from typing import Optional
 class Settings(BaseSettings):
     # Database - Railway से automatically मिलेगा
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # Derived from DATABASE_URL (aiomysql) when unset
+    
+    # Connection pool (per engine: the sync and the async engine each get one)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 10  # Seconds to wait for a connection before failing
+    DB_POOL_RECYCLE: int = 3600
+    DB_PRE_PING: str = "idle"  # always | idle (only after DB_PRE_PING_IDLE_SECONDS unused) | never
+    DB_PRE_PING_IDLE_SECONDS: int = 30
+    DB_CONNECTION_BUDGET_MS: int = 500  # Log checkouts held longer than this
     
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Uploaded attachments (shared by the API and send workers)
+    ATTACHMENT_STORE_DIR: str = "data/attachments"
+    ATTACHMENT_CHUNK_SIZE: int = 1024 * 1024  # Bytes copied per read while streaming uploads
+    
+    # Size limits (providers may lower the attachment limits, see app/core/attachment_limits.py)
+    MAX_ATTACHMENT_SIZE: int = 25 * 1024 * 1024  # Decoded bytes per attachment
+    MAX_TOTAL_ATTACHMENT_SIZE: int = 25 * 1024 * 1024  # Decoded bytes per email
+    MAX_REQUEST_BODY_SIZE: int = 36 * 1024 * 1024  # Raw request bytes (25MB base64 is ~33.4MB)
+    
+    # Password hashing (Argon2)
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 102400  # KiB (100MB)
+    ARGON2_PARALLELISM: int = 8
+    HASH_POOL_WORKERS: int = 2  # Hashing processes (0 = hash inline in the request thread)
+    HASH_QUEUE_LIMIT: int = 16  # Hash jobs allowed to wait before returning 503
+    HASH_RETRY_AFTER: int = 2  # Seconds, sent as Retry-After with the 503
+    
     # App
     APP_NAME: str = "Premium Email App"
     DEBUG: bool = False
     
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_SUCCESS_SAMPLE_RATE: float = 0.01  # Share of per-recipient success lines that are logged
+    
     # AES Encryption
     AES_SECRET_KEY: Optional[str] = None
+    PREVIOUS_SECRET_KEYS: Optional[str] = None  # Comma separated, still accepted for decryption
+    
+    # Decrypted SMTP credential cache (per process)
+    CREDENTIAL_CACHE_SIZE: int = 1024
+    CREDENTIAL_CACHE_TTL: int = 300  # Seconds
+    
+    # Per-user suppression sets (per process; changes made elsewhere show up after the TTL)
+    SUPPRESSION_CACHE_SIZE: int = 1000  # Users
+    SUPPRESSION_CACHE_TTL: int = 300  # Seconds
+    
+    # Compiled mail merge templates (per process, keyed by content hash)
+    TEMPLATE_CACHE_SIZE: int = 256
+    
+    # Authenticated user cache (per process)
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 30  # Seconds - upper bound for a block to reach other processes (0 = no cache)
+    
+    # SMTP connection pool (per sender account)
+    SMTP_TIMEOUT: int = 30
+    SMTP_POOL_MAX_SESSIONS: int = 4
+    SMTP_MAX_MESSAGES_PER_SESSION: int = 100  # Reconnect after this many messages
+    SMTP_POOL_IDLE_TIMEOUT: int = 120  # Drop sessions idle longer than this (seconds)
+    SMTP_NOOP_AFTER_IDLE: int = 10  # NOOP health check when idle longer than this (seconds)
+    
+    # CSV recipient list import
+    RECIPIENT_IMPORT_BATCH_SIZE: int = 5000  # Rows validated and inserted together
+    RECIPIENT_IMPORT_WORKERS: int = 0  # Validation processes (0 = in the request thread; helps lists with many distinct domains)
+    MAX_RECIPIENT_LIST_SIZE: int = 500000  # Addresses per list
+    RECIPIENT_IMPORT_BYTES_PER_ROW: int = 512  # Upload size limit = MAX_RECIPIENT_LIST_SIZE rows of this size
+    
+    # Send queue workers (python -m app.worker)
+    WORKER_BATCH_SIZE: int = 50
+    # Longest idle sleep: workers wake at the next known due time and at once for
+    # sends queued by this process; sends queued by other processes wait up to this
+    WORKER_POLL_INTERVAL: float = 30.0
+    SCHEDULER_WINDOW: int = 100  # Upcoming due times read from the queue per refill
+    MAX_SCHEDULE_DAYS: int = 90  # How far ahead send_at may be
+    WORKER_LEASE_SECONDS: int = 300  # 'sending' rows older than this are reclaimed
+    EMBEDDED_WORKERS: int = 1  # Worker threads inside the API process (0 = external workers only)
+    STATUS_FLUSH_SIZE: int = 200  # Buffered delivery status updates written per bulk UPDATE
+    STATUS_FLUSH_INTERVAL: float = 1.0  # Max seconds an update waits (also flushed after each campaign batch)
+    
+    # Send rate limits for custom SMTP servers (gmail/outlook/yahoo use built-in profiles)
+    SEND_RATE_PER_MINUTE: int = 60  # 0 = unlimited
+    SEND_DAILY_LIMIT: int = 0  # 0 = unlimited
+    SEND_MAX_RECIPIENTS_PER_MESSAGE: int = 100
+    SEND_THROTTLE_BACKOFF: int = 60  # Seconds a sender is paused after a 421/454 reply
+    
+    # Retries of transient failures (4xx replies, dropped connections)
+    SEND_MAX_ATTEMPTS: int = 5  # Including the first try
+    SEND_RETRY_BASE_DELAY: int = 60  # Seconds before the first retry, doubled each time
+    SEND_RETRY_MAX_DELAY: int = 3600
+    
+    # Campaign progress streams (GET /api/v1/emails/{id}/events)
+    PROGRESS_POLL_INTERVAL: float = 5.0  # Seconds without events before the database is re-read
+    PROGRESS_QUEUE_SIZE: int = 1000  # Events buffered per stream before it falls back to a re-read
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,223 @@
+"""
+Async SMTP client (aiosmtplib) - same message rendering as SMTPClient,
+but sending waits on sockets instead of blocking a thread
+
+Used by request handlers that talk to SMTP themselves (POST /email-config/test).
+Campaigns are sent by app.worker threads over the pooled SMTPClient.
+"""
+import asyncio
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import aiosmtplib
+
+from app.config import settings
+from app.core.metrics import SMTP_PHASE_DURATION, observe
+from app.core.smtp_client import SMTPClient, PreparedMessage
+from app.core.smtp_pool import SMTPPoolTimeout
+
+RECONNECT_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError,
+                    ConnectionError, asyncio.TimeoutError)
+
+
+def _is_service_closing(exc: Exception) -> bool:
+    if getattr(exc, 'code', None) == 421:
+        return True
+    if isinstance(exc, aiosmtplib.SMTPRecipientsRefused):
+        return any(refused.code == 421 for refused in exc.recipients)
+    return False
+
+
+class AsyncPooledSMTPConnection:
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+    async def close(self):
+        try:
+            await self.client.quit()
+        except Exception:
+            self.client.close()
+
+
+class AsyncSMTPPool:
+    """
+    Async counterpart of SMTPConnectionPool for one sender account:
+    at most max_sessions logged-in sessions, NOOP-checked after being idle,
+    replaced after SMTP_MAX_MESSAGES_PER_SESSION messages or on 421.
+    Bound to the event loop it is first used on.
+    """
+
+    def __init__(self, smtp_host: str, smtp_port: int, username: str, password: str,
+                 use_tls: bool = True, max_sessions: Optional[int] = None):
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_sessions = max_sessions or settings.SMTP_POOL_MAX_SESSIONS
+        self.timeout = settings.SMTP_TIMEOUT
+
+        self._idle: deque = deque()
+        self._slots = asyncio.Semaphore(self.max_sessions)
+
+    async def _connect(self) -> AsyncPooledSMTPConnection:
+        client = aiosmtplib.SMTP(
+            hostname=self.smtp_host,
+            port=self.smtp_port,
+            timeout=self.timeout,
+            use_tls=False,
+            start_tls=self.use_tls
+        )
+        # connect() includes STARTTLS when use_tls is set
+        with observe(SMTP_PHASE_DURATION, "connect"):
+            await client.connect()
+        try:
+            with observe(SMTP_PHASE_DURATION, "login"):
+                await client.login(self.username, self.password)
+        except Exception:
+            client.close()
+            raise
+        return AsyncPooledSMTPConnection(client)
+
+    async def _is_healthy(self, conn: AsyncPooledSMTPConnection) -> bool:
+        if not conn.client.is_connected:
+            return False
+        idle_for = time.monotonic() - conn.last_used
+        if idle_for > settings.SMTP_POOL_IDLE_TIMEOUT:
+            return False
+        if idle_for < settings.SMTP_NOOP_AFTER_IDLE:
+            return True
+        try:
+            with observe(SMTP_PHASE_DURATION, "noop"):
+                response = await conn.client.noop()
+            return response.code == 250
+        except Exception:
+            return False
+
+    async def acquire(self) -> AsyncPooledSMTPConnection:
+        """Take a session slot, reusing a healthy idle session when there is one"""
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise SMTPPoolTimeout(f"No SMTP session available for {self.username} after waiting")
+
+        try:
+            while self._idle:
+                conn = self._idle.pop()
+                if await self._is_healthy(conn):
+                    return conn
+                await conn.close()
+            return await self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, conn: AsyncPooledSMTPConnection, discard: bool = False):
+        conn.last_used = time.monotonic()
+        try:
+            if discard or conn.messages_sent >= settings.SMTP_MAX_MESSAGES_PER_SESSION:
+                await conn.close()
+            else:
+                self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    async def close_all(self):
+        idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            await conn.close()
+
+    async def sendmail(self, from_addr: str, to_addrs: List[str], message: bytes) -> Dict:
+        """Send on a pooled session; a dropped session or a 421 is retried once"""
+        for attempt in range(2):
+            conn = await self.acquire()
+            try:
+                # aiosmtplib's sendmail covers MAIL/RCPT and DATA in one call
+                with observe(SMTP_PHASE_DURATION, "data"):
+                    refused, _ = await conn.client.sendmail(from_addr, to_addrs, message)
+            except Exception as e:
+                await self.release(conn, discard=True)
+                if attempt == 0 and (isinstance(e, RECONNECT_ERRORS) or _is_service_closing(e)):
+                    continue
+                raise
+            conn.messages_sent += 1
+            await self.release(conn)
+            return refused
+
+
+# event loop -> {(host, port, username, use_tls): pool}
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, AsyncSMTPPool]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def get_async_smtp_pool(smtp_host: str, smtp_port: int, username: str, password: str,
+                        use_tls: bool = True, max_sessions: Optional[int] = None) -> AsyncSMTPPool:
+    """Get (or create) the pool for a sender account on the running event loop"""
+    loop_pools = _pools.setdefault(asyncio.get_running_loop(), {})
+    key = (smtp_host, smtp_port, username, use_tls)
+    pool = loop_pools.get(key)
+    if pool is not None and pool.password == password and \
+            (not max_sessions or pool.max_sessions == max_sessions):
+        return pool
+
+    if pool is not None:
+        # Password or session cap changed - idle sessions of the old pool are closed
+        asyncio.get_running_loop().create_task(pool.close_all())
+    pool = AsyncSMTPPool(smtp_host, smtp_port, username, password, use_tls,
+                         max_sessions=max_sessions)
+    loop_pools[key] = pool
+    return pool
+
+
+async def close_all_async_pools():
+    """Close idle sessions of every pool on the running event loop (used on shutdown)"""
+    loop_pools = _pools.pop(asyncio.get_running_loop(), {})
+    for pool in loop_pools.values():
+        await pool.close_all()
+
+
+class AsyncSMTPClient(SMTPClient):
+    """SMTPClient whose sending methods are coroutines"""
+
+    @property
+    def pool(self) -> AsyncSMTPPool:
+        return get_async_smtp_pool(self.smtp_host, self.smtp_port,
+                                   self.username, self.password, self.use_tls,
+                                   max_sessions=self.max_sessions)
+
+    async def send_prepared(self, prepared: PreparedMessage, to_email: List[str],
+                            cc_email: Optional[List[str]] = None,
+                            bcc_email: Optional[List[str]] = None,
+                            variables: Optional[Dict[str, str]] = None) -> str:
+        """
+        Send a prepared message.
+        Returns: Message ID
+        """
+        all_recipients = list(to_email)
+        if cc_email:
+            all_recipients.extend(cc_email)
+        if bcc_email:
+            all_recipients.extend(bcc_email)
+
+        message, message_id = prepared.message_bytes(to_email, cc_email, variables)
+        await self.pool.sendmail(self.username, all_recipients, message)
+        return message_id
+
+    async def send_email(self, to_email: List[str], subject: str, body: str,
+                         is_html: bool = False, cc_email: Optional[List[str]] = None,
+                         bcc_email: Optional[List[str]] = None,
+                         attachments: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        Render and send one email.
+        Returns: Message ID
+        """
+        if attachments:
+            # Reading and encoding attachments is file IO and CPU work - keep it off the loop
+            prepared = await asyncio.to_thread(self.prepare_message, subject, body, is_html, attachments)
+        else:
+            prepared = self.prepare_message(subject, body, is_html)
+        return await self.send_prepared(prepared, to_email, cc_email, bcc_email)
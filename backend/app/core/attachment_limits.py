@@ -0,0 +1,51 @@
+"""
+Attachment size limits - checked from base64 lengths, without decoding
+"""
+from typing import Dict, NamedTuple, Optional
+
+from app.config import settings
+
+MB = 1024 * 1024
+
+
+class AttachmentLimits(NamedTuple):
+    per_attachment: int
+    total: int
+
+
+# Largest attachments each provider accepts on one message (decoded bytes)
+PROVIDER_ATTACHMENT_LIMITS: Dict[str, AttachmentLimits] = {
+    "gmail": AttachmentLimits(per_attachment=25 * MB, total=25 * MB),
+    "outlook": AttachmentLimits(per_attachment=20 * MB, total=20 * MB),
+    "yahoo": AttachmentLimits(per_attachment=25 * MB, total=25 * MB),
+}
+
+
+def limits_for_provider(provider: Optional[str]) -> AttachmentLimits:
+    """Provider limits, never above the configured MAX_ATTACHMENT_SIZE / MAX_TOTAL_ATTACHMENT_SIZE"""
+    per_attachment = settings.MAX_ATTACHMENT_SIZE
+    total = settings.MAX_TOTAL_ATTACHMENT_SIZE
+    provider_limits = PROVIDER_ATTACHMENT_LIMITS.get(provider or "")
+    if provider_limits:
+        per_attachment = min(per_attachment, provider_limits.per_attachment)
+        total = min(total, provider_limits.total)
+    return AttachmentLimits(per_attachment=per_attachment, total=total)
+
+
+def base64_decoded_size(data: str) -> int:
+    """
+    Decoded size of a base64 string from its length and padding alone.
+    Line breaks inside the data only make this an over-estimate.
+    """
+    length = len(data)
+    if data.endswith("=="):
+        padding = 2
+    elif data.endswith("="):
+        padding = 1
+    else:
+        padding = 0
+    return length * 3 // 4 - padding
+
+
+def format_size(size: int) -> str:
+    return f"{size / MB:.1f}MB"
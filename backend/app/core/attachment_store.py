@@ -0,0 +1,123 @@
+"""
+Attachment store - content-addressed files shared across campaigns
+"""
+import base64
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Tuple
+
+from app.config import settings
+
+# 57 raw bytes -> one 76 character base64 line (RFC 2045)
+_B64_LINE_BYTES = 57
+
+
+class AttachmentStore:
+    """
+    Local filesystem store keyed by SHA-256 of the content, so the same
+    file uploaded again (by anyone, for any campaign) is stored once.
+
+    Next to each blob a MIME-ready base64 rendering (76 character CRLF
+    lines) is cached the first time it is needed, so sending an attachment
+    again costs no re-encoding. Uploads are copied in fixed-size chunks.
+    API processes and send workers must share ATTACHMENT_STORE_DIR.
+    """
+
+    def __init__(self, root: str, chunk_size: int = 1024 * 1024):
+        self.root = root
+        # Whole base64 lines per chunk keeps streamed encoding line-aligned
+        self.chunk_size = max(chunk_size // _B64_LINE_BYTES, 1) * _B64_LINE_BYTES
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, handle: str) -> str:
+        if len(handle or "") != 64 or not all(c in "0123456789abcdef" for c in handle):
+            raise ValueError(f"Invalid attachment handle: {handle!r}")
+        return os.path.join(self.root, handle[:2], handle[2:4], handle)
+
+    def encoded_path(self, handle: str) -> str:
+        return self.path(handle) + ".b64"
+
+    def exists(self, handle: str) -> bool:
+        return os.path.exists(self.path(handle))
+
+    def _publish(self, tmp_path: str, final_path: str):
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+
+    def save_stream(self, source: BinaryIO, max_bytes: int = 0) -> Tuple[str, int]:
+        """
+        Copy a file-like object into the store, hashing it on the way.
+        Returns (handle, size); content already stored is not written twice.
+        Raises ValueError if more than max_bytes (when set) arrive.
+        """
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as target:
+                while True:
+                    chunk = source.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_bytes and size > max_bytes:
+                        raise ValueError(f"Attachment exceeds {max_bytes} bytes")
+                    digest.update(chunk)
+                    target.write(chunk)
+
+            handle = digest.hexdigest()
+            if self.exists(handle):
+                os.remove(tmp_path)
+            else:
+                self._publish(tmp_path, self.path(handle))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return handle, size
+
+    def open(self, handle: str) -> BinaryIO:
+        return open(self.path(handle), "rb")
+
+    def read(self, handle: str) -> bytes:
+        with self.open(handle) as f:
+            return f.read()
+
+    def read_encoded(self, handle: str) -> bytes:
+        """Base64 body (CRLF terminated 76 char lines), encoded once and cached on disk"""
+        encoded_path = self.encoded_path(handle)
+        try:
+            with open(encoded_path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".encode-")
+        try:
+            with os.fdopen(fd, "wb") as target, self.open(handle) as source:
+                while True:
+                    chunk = source.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    encoded = base64.b64encode(chunk)
+                    target.write(b"\r\n".join(
+                        encoded[i:i + 76] for i in range(0, len(encoded), 76)
+                    ) + b"\r\n")
+            self._publish(tmp_path, encoded_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with open(encoded_path, "rb") as f:
+            return f.read()
+
+    def delete(self, handle: str):
+        for path in (self.path(handle), self.encoded_path(handle)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+attachment_store = AttachmentStore(settings.ATTACHMENT_STORE_DIR, settings.ATTACHMENT_CHUNK_SIZE)
@@ -0,0 +1,202 @@
+"""
+Database connection pool - configurable pre-ping and checkout metrics
+"""
+import logging
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+from app.core.metrics import DB_CHECKOUT_WAIT, DB_QUERY_DURATION
+
+logger = logging.getLogger(__name__)
+
+PRE_PING_STRATEGIES = ("always", "idle", "never")
+
+
+class PoolMetrics:
+    """Checkout wait, hold time and overflow counters for one pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_timeouts = 0
+        self.overflow_events = 0
+        self.in_use_peak = 0
+        self.hold_time_total = 0.0
+        self.hold_time_max = 0.0
+        self.over_budget = 0
+        self.pings = 0
+        self.ping_failures = 0
+        self.pool = None
+
+    def record_checkout(self, wait: float, overflowed: bool, in_use: int):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_total += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+            if overflowed:
+                self.overflow_events += 1
+            self.in_use_peak = max(self.in_use_peak, in_use)
+
+    def record_timeout(self, wait: float):
+        with self._lock:
+            self.checkout_timeouts += 1
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+
+    def record_checkin(self, held: float) -> bool:
+        """Returns True if the connection was held longer than DB_CONNECTION_BUDGET_MS"""
+        over = held * 1000 > settings.DB_CONNECTION_BUDGET_MS
+        with self._lock:
+            self.hold_time_total += held
+            self.hold_time_max = max(self.hold_time_max, held)
+            if over:
+                self.over_budget += 1
+        return over
+
+    def stats(self) -> Dict:
+        with self._lock:
+            checkouts = self.checkouts
+            stats = {
+                "checkouts": checkouts,
+                "checkout_wait_avg_ms": round(self.checkout_wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+                "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+                "checkout_timeouts": self.checkout_timeouts,
+                "overflow_events": self.overflow_events,
+                "in_use_peak": self.in_use_peak,
+                "hold_time_avg_ms": round(self.hold_time_total / checkouts * 1000, 3) if checkouts else 0.0,
+                "hold_time_max_ms": round(self.hold_time_max * 1000, 3),
+                "over_budget": self.over_budget,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+            }
+        if self.pool is not None:
+            stats.update({
+                "pool_size": self.pool.size(),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "in_use": self.pool.checkedout(),
+                "idle": self.pool.checkedin(),
+                "overflow": max(self.pool.overflow(), 0),
+            })
+        return stats
+
+
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+class _InstrumentedPoolMixin:
+    """Times QueuePool checkouts (queue wait plus any new connection) and counts overflow"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        overflow_before = self._overflow
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        wait = time.perf_counter() - start
+        DB_CHECKOUT_WAIT.labels(self.metrics.name).observe(wait)
+        self.metrics.record_checkout(
+            wait,
+            overflowed=self._overflow > overflow_before and self._overflow > 0,
+            in_use=self.checkedout()
+        )
+        return record
+
+    def _do_return_conn(self, record):
+        checked_out_at = record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            held = time.perf_counter() - checked_out_at
+            if self.metrics.record_checkin(held):
+                logger.warning("%s DB connection held for %.0f ms (budget %d ms)",
+                               self.metrics.name, held * 1000, settings.DB_CONNECTION_BUDGET_MS)
+        super()._do_return_conn(record)
+
+
+def _instrumented(base):
+    # Keep SQLAlchemy's own pool log lines under the sqlalchemy.* logger names
+    return type(f"Instrumented{base.__name__}", (_InstrumentedPoolMixin, base),
+                {"__module__": base.__module__})
+
+
+InstrumentedQueuePool = _instrumented(QueuePool)
+InstrumentedAsyncQueuePool = _instrumented(AsyncAdaptedQueuePool)
+
+
+def pool_options(name: str, async_engine: bool = False) -> Dict:
+    """create_engine / create_async_engine keyword arguments from settings"""
+    if settings.DB_PRE_PING not in PRE_PING_STRATEGIES:
+        raise ValueError(f"DB_PRE_PING must be one of {', '.join(PRE_PING_STRATEGIES)}")
+
+    metrics = pool_metrics.setdefault(name, PoolMetrics(name))
+    base = InstrumentedAsyncQueuePool if async_engine else InstrumentedQueuePool
+    poolclass = type(base.__name__, (base,), {"metrics": metrics, "__module__": base.__module__})
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_PRE_PING == "always",
+    }
+
+
+def instrument_engine(engine: Engine, name: str):
+    """
+    Hook hold-time tracking and the 'idle' pre-ping strategy onto an engine
+    (for an AsyncEngine pass its sync_engine)
+    """
+    metrics = pool_metrics[name]
+    metrics.pool = engine.pool
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        now = time.perf_counter()
+        last_used = connection_record.info.get("last_used")
+        if settings.DB_PRE_PING == "idle" and last_used is not None \
+                and now - last_used > settings.DB_PRE_PING_IDLE_SECONDS:
+            # Only connections that sat idle can have been dropped by the server
+            metrics.pings += 1
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            except Exception as e:
+                metrics.ping_failures += 1
+                raise exc.DisconnectionError(f"Stale connection: {e}")
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+        connection_record.info["checked_out_at"] = now
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info["last_used"] = time.perf_counter()
+
+    query_duration = DB_QUERY_DURATION.labels(name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started_at", None)
+        if started is not None:
+            query_duration.observe(time.perf_counter() - started)
+
+
+def pool_stats() -> Dict[str, Dict]:
+    return {name: metrics.stats() for name, metrics in pool_metrics.items()}
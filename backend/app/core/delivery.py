@@ -0,0 +1,48 @@
+"""
+Concurrent delivery of a prepared message to many recipients
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from app.core.smtp_client import SMTPClient, PreparedMessage
+
+
+class DeliveryOutcome(NamedTuple):
+    key: Any  # Caller's handle for the recipient (e.g. the delivery row)
+    recipient: str
+    message_id: Optional[str]
+    error: Optional[Exception]
+
+
+def send_concurrently(smtp_client: SMTPClient, prepared: PreparedMessage,
+                      jobs: List[Tuple[Any, str, Optional[Dict[str, str]]]],
+                      max_parallel: int, cc_email: Optional[List[str]] = None,
+                      bcc_email: Optional[List[str]] = None) -> Iterator[DeliveryOutcome]:
+    """
+    Send `prepared` to each (key, recipient, template variables) job using
+    up to max_parallel SMTP sessions at once, yielding outcomes as they
+    complete. Every message also goes to the campaign's cc/bcc addresses.
+
+    Only SMTP work runs on the pool threads; callers record outcomes (and
+    touch their DB session) from the thread iterating this generator.
+    """
+    def _send(key, recipient, variables) -> DeliveryOutcome:
+        try:
+            message_id = smtp_client.send_prepared(
+                prepared, to_email=[recipient], cc_email=cc_email, bcc_email=bcc_email,
+                variables=variables
+            )
+            return DeliveryOutcome(key, recipient, message_id, None)
+        except Exception as e:
+            return DeliveryOutcome(key, recipient, None, e)
+
+    if max_parallel <= 1 or len(jobs) <= 1:
+        for key, recipient, variables in jobs:
+            yield _send(key, recipient, variables)
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(jobs)),
+                            thread_name_prefix="smtp-send") as executor:
+        futures = [executor.submit(_send, *job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
@@ -1,29 +1,28 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Annotated
+from typing import Annotated, Optional
 
-from app.database import get_db
-from app.crud.user import get_user_by_id
+from app.database import get_db, get_async_db
+from app.crud.user import CachedUser, get_cached_user, load_cached_user, user_cache
 from app.core.security import verify_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def _token_user_id(token: str) -> int:
     token_data = verify_token(token)
     if token_data is None:
         raise credentials_exception
-    
-    user = get_user_by_id(db, user_id=token_data.user_id)
+    return token_data.user_id
+
+def _check_active(user: Optional[CachedUser]) -> CachedUser:
     if user is None:
         raise credentials_exception
     
@@ -33,4 +32,26 @@ def get_current_user(
             detail="User account is not active"
         )
     
-    return user
\ No newline at end of file
+    return user
+
+def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Session = Depends(get_db)
+):
+    user_id = _token_user_id(token)
+    
+    # Served from a short-lived per-process cache; no DB round-trip on a hit
+    return _check_active(get_cached_user(db, user_id=user_id))
+
+async def get_current_user_async(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Same as get_current_user, for async endpoints"""
+    user_id = _token_user_id(token)
+    
+    # Cache hits skip run_sync; a miss is counted once
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await db.run_sync(load_cached_user, user_id)
+    return _check_active(user)
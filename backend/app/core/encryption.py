@@ -1,49 +1,92 @@
 """
 Encryption utilities for securing email passwords
 """
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 import base64
 import os
+from functools import lru_cache
+from typing import Optional, Tuple
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from app.config import settings
+from app.core.metrics import ENCRYPTION_DURATION, observe
 
-# Generate a key from settings secret key
-def get_encryption_key():
-    """Get encryption key from settings"""
-    secret_key = settings.SECRET_KEY.encode()
-    salt = b'premium_email_app_salt'  # You can make this configurable
-    
+ENCRYPTION_SALT = b'premium_email_app_salt'  # You can make this configurable
+PBKDF2_ITERATIONS = 100000
+
+@lru_cache(maxsize=None)
+def _derive_key(secret_key: str) -> bytes:
+    """PBKDF2 is deliberately slow - derive each secret's key once per process"""
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,
-        salt=salt,
-        iterations=100000,
+        salt=ENCRYPTION_SALT,
+        iterations=PBKDF2_ITERATIONS,
     )
-    
-    key = base64.urlsafe_b64encode(kdf.derive(secret_key))
-    return key
+    return base64.urlsafe_b64encode(kdf.derive(secret_key.encode()))
+
+def _previous_secret_keys() -> Tuple[str, ...]:
+    """Retired secrets from PREVIOUS_SECRET_KEYS (comma separated, newest first)"""
+    raw = settings.PREVIOUS_SECRET_KEYS or ""
+    return tuple(key.strip() for key in raw.split(",") if key.strip())
+
+@lru_cache(maxsize=4)
+def _primary_fernet(secret_key: str) -> Fernet:
+    return Fernet(_derive_key(secret_key))
+
+@lru_cache(maxsize=4)
+def _build_key_ring(secret_key: str, previous_keys: Tuple[str, ...]) -> MultiFernet:
+    fernets = [Fernet(_derive_key(secret_key))]
+    fernets.extend(Fernet(_derive_key(key)) for key in previous_keys)
+    return MultiFernet(fernets)
+
+# Generate a key from settings secret key
+def get_encryption_key():
+    """Get encryption key from settings"""
+    return _derive_key(settings.SECRET_KEY)
+
+def get_fernet() -> MultiFernet:
+    """
+    Key ring that encrypts with SECRET_KEY and still decrypts tokens made
+    with any of PREVIOUS_SECRET_KEYS. Built once per process.
+    """
+    return _build_key_ring(settings.SECRET_KEY, _previous_secret_keys())
 
 def encrypt_password(password: str):
     """Encrypt a password"""
-    key = get_encryption_key()
-    fernet = Fernet(key)
-    
-    encrypted_password = fernet.encrypt(password.encode())
-    
+    fernet = get_fernet()
+
+    with observe(ENCRYPTION_DURATION, "encrypt"):
+        encrypted_password = fernet.encrypt(password.encode())
+
     # Generate IV (Fernet handles this internally, but we return the token)
     # For Fernet, the first part of the token is essentially the IV
     iv = base64.urlsafe_b64encode(os.urandom(16)).decode()
-    
+
     return encrypted_password.decode(), iv
 
 def decrypt_password(encrypted_password: str, iv: str) -> str:
     """Decrypt a password"""
     try:
-        key = get_encryption_key()
-        fernet = Fernet(key)
-        
-        decrypted_password = fernet.decrypt(encrypted_password.encode())
+        fernet = get_fernet()
+
+        with observe(ENCRYPTION_DURATION, "decrypt"):
+            decrypted_password = fernet.decrypt(encrypted_password.encode())
         return decrypted_password.decode()
     except Exception as e:
-        raise ValueError(f"Decryption failed: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Decryption failed: {str(e)}")
+
+def decrypt_password_for_rotation(encrypted_password: str, iv: str) -> Tuple[str, Optional[str]]:
+    """
+    Decrypt a password; when the token was made with one of
+    PREVIOUS_SECRET_KEYS also return it re-encrypted under SECRET_KEY
+    (None when it already is), so the caller can store the new token.
+    """
+    token = encrypted_password.encode()
+    try:
+        with observe(ENCRYPTION_DURATION, "decrypt"):
+            return _primary_fernet(settings.SECRET_KEY).decrypt(token).decode(), None
+    except InvalidToken:
+        pass
+    password = decrypt_password(encrypted_password, iv)
+    return password, get_fernet().rotate(token).decode()
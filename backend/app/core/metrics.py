@@ -0,0 +1,146 @@
+"""
+Prometheus metrics - served at /metrics
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+
+# Bucket sets (seconds)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SMTP_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], buckets=REQUEST_BUCKETS
+)
+
+SMTP_PHASE_DURATION = Histogram(
+    "smtp_phase_duration_seconds",
+    "Time spent per SMTP phase (connect, starttls, login, envelope, data, noop)",
+    ["phase"], buckets=SMTP_BUCKETS
+)
+
+SMTP_RECIPIENTS = Counter(
+    "smtp_recipients_total", "Recipients processed by the send workers",
+    ["provider", "outcome"]
+)
+
+ENCRYPTION_DURATION = Histogram(
+    "credential_encryption_duration_seconds", "Fernet encryption/decryption of SMTP passwords",
+    ["operation"], buckets=FAST_BUCKETS
+)
+
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "Argon2 hash/verify time, including the wait for a pool slot",
+    ["operation"], buckets=REQUEST_BUCKETS
+)
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Statement execution time",
+    ["engine"], buckets=FAST_BUCKETS
+)
+
+DB_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time to get a connection from the pool",
+    ["engine"], buckets=FAST_BUCKETS
+)
+
+
+@contextmanager
+def observe(histogram: Histogram, *labels: str):
+    """Record the duration of the with-block on histogram(labels)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - start)
+
+
+class RuntimeStatsCollector:
+    """
+    Scrape-time gauges from state the app already keeps: DB pool and
+    cache statistics, and queue depth (one grouped COUNT on email_deliveries).
+    """
+
+    def describe(self):
+        # Registering must not run collect() - it would query the DB at import time
+        return []
+
+    def collect(self):
+        from app.core.db_pool import pool_stats
+        from app.crud.email_crud import smtp_settings_cache
+        from app.crud.suppression_crud import suppression_cache
+        from app.crud.user import user_cache
+
+        pool_gauges = {
+            "in_use": GaugeMetricFamily("db_pool_in_use", "Connections checked out", labels=["engine"]),
+            "idle": GaugeMetricFamily("db_pool_idle", "Connections idle in the pool", labels=["engine"]),
+            "overflow": GaugeMetricFamily("db_pool_overflow", "Overflow connections open", labels=["engine"]),
+            "pool_size": GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["engine"]),
+        }
+        pool_counters = {
+            "overflow_events": CounterMetricFamily("db_pool_overflow_events", "Checkouts that opened an overflow connection", labels=["engine"]),
+            "checkout_timeouts": CounterMetricFamily("db_pool_checkout_timeouts", "Checkouts that timed out", labels=["engine"]),
+            "over_budget": CounterMetricFamily("db_pool_over_budget", "Checkouts held longer than DB_CONNECTION_BUDGET_MS", labels=["engine"]),
+        }
+        for engine_name, stats in pool_stats().items():
+            for key, family in list(pool_gauges.items()) + list(pool_counters.items()):
+                if key in stats:
+                    family.add_metric([engine_name], stats[key])
+        yield from pool_gauges.values()
+        yield from pool_counters.values()
+
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        size = GaugeMetricFamily("cache_entries", "Cached entries", labels=["cache"])
+        caches = (("smtp_settings", smtp_settings_cache), ("users", user_cache),
+                  ("suppressions", suppression_cache))
+        for cache_name, cache in caches:
+            stats = cache.stats()
+            hits.add_metric([cache_name], stats["hits"])
+            misses.add_metric([cache_name], stats["misses"])
+            size.add_metric([cache_name], stats["size"])
+        yield from (hits, misses, size)
+
+        depth = GaugeMetricFamily("send_queue_deliveries", "Deliveries waiting or in flight", labels=["status"])
+        for status_name, count in _queue_depth():
+            depth.add_metric([status_name], count)
+        yield depth
+
+
+def _queue_depth():
+    from sqlalchemy import func
+    from app.database import SessionLocal
+    from app.models.email_delivery import EmailDelivery
+
+    db = SessionLocal()
+    try:
+        return db.query(EmailDelivery.status, func.count(EmailDelivery.id))\
+            .filter(EmailDelivery.status.in_(("queued", "sending")))\
+            .group_by(EmailDelivery.status)\
+            .all()
+    except Exception:
+        return []
+    finally:
+        db.close()
+
+
+REGISTRY.register(RuntimeStatsCollector())
+
+
+def render_metrics():
+    """Exposition payload and content type; aggregates workers when PROMETHEUS_MULTIPROC_DIR is set"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(RuntimeStatsCollector())
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
@@ -0,0 +1,127 @@
+"""
+ASGI middleware
+"""
+import time
+from typing import Dict, Optional
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import HTTP_REQUEST_DURATION
+
+
+class RequestBodyTooLarge(HTTPException):
+    def __init__(self, max_body_size: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Request body exceeds {max_body_size} bytes"
+        )
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies larger than max_body_size with 413.
+
+    A too large Content-Length is refused before any of the body is read;
+    otherwise bytes are counted as they stream in and reading stops at the
+    limit, so an oversized JSON payload is never buffered or parsed whole.
+    path_limits overrides the limit for routes under a path prefix (uploads
+    that are streamed to disk rather than parsed in memory).
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int,
+                 path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.path_limits = path_limits or {}
+
+    def _limit_for(self, path: str) -> int:
+        for prefix, limit in self.path_limits.items():
+            if path.startswith(prefix):
+                return limit
+        return self.max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        max_body_size = self._limit_for(scope.get("path", "")) if scope["type"] == "http" else 0
+        if not max_body_size:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > max_body_size:
+                    await self._reject(scope, receive, send, max_body_size)
+                    return
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_size:
+                    # An HTTPException passes through FastAPI's body parsing untouched
+                    raise RequestBodyTooLarge(max_body_size)
+            return message
+
+        async def tracking_send(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestBodyTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send, max_body_size)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, max_body_size: int):
+        exc = RequestBodyTooLarge(max_body_size)
+        response = JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": exc.detail},
+            headers={"Connection": "close"}
+        )
+        await response(scope, receive, send)
+
+
+class MetricsMiddleware:
+    """Times every HTTP request, labelled by route template rather than raw path"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def tracking_send(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, tracking_send)
+        finally:
+            # FastAPI stores the matched route in the scope while routing
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code)
+            ).observe(time.perf_counter() - start)
@@ -0,0 +1,84 @@
+"""
+Campaign progress events - in-process pub/sub from the send workers to the SSE streams
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from app.config import settings
+
+
+class Subscription:
+    """One stream's queue of events for one campaign, owned by its event loop"""
+
+    def __init__(self, email_log_id: int, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.email_log_id = email_log_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[Dict]" = asyncio.Queue(maxsize)
+        # Set when events were dropped; the stream re-reads the database instead
+        self.overflowed = False
+
+    def _offer(self, event: Dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout: float) -> Optional[Dict]:
+        """Next event, or None on timeout or after an overflow"""
+        if self.overflowed:
+            self.overflowed = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return None
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ProgressHub:
+    """
+    Workers publish from their threads, streams consume on the event loop.
+    Publishing never blocks: a slow stream loses events (and catches up from
+    the database) rather than holding up a send. Only workers running in this
+    process reach these streams; the streams poll for the rest.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, email_log_id: int) -> Subscription:
+        """Call on the event loop the subscription will be read from"""
+        subscription = Subscription(email_log_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions[email_log_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.email_log_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.email_log_id]
+
+    def has_subscribers(self, email_log_id: int) -> bool:
+        """Cheap check so publishers skip building events nobody reads"""
+        return email_log_id in self._subscriptions
+
+    def publish(self, email_log_id: int, event: Dict):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(email_log_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, event)
+            except RuntimeError:
+                # Loop already closed (shutdown); the stream is gone
+                pass
+
+
+progress_hub = ProgressHub(settings.PROGRESS_QUEUE_SIZE)
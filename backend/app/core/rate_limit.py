@@ -0,0 +1,91 @@
+"""
+Provider send quotas - token bucket pacing and daily limits per sender account
+"""
+import math
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.config import settings
+
+# Replies providers use to say "slow down" rather than "no"
+THROTTLE_CODES = frozenset({421, 454})
+
+
+class ProviderProfile(NamedTuple):
+    per_minute: int  # Sustained messages per minute (0 = unlimited)
+    per_day: int  # Messages per rolling day (0 = unlimited)
+    recipients_per_message: int
+    burst: int  # Messages that may go out back to back before pacing kicks in
+
+
+# Published sending limits, kept a little under the hard caps
+PROVIDER_PROFILES = {
+    "gmail": ProviderProfile(per_minute=20, per_day=500, recipients_per_message=100, burst=5),
+    "outlook": ProviderProfile(per_minute=30, per_day=10000, recipients_per_message=500, burst=5),
+    "yahoo": ProviderProfile(per_minute=20, per_day=500, recipients_per_message=100, burst=5),
+}
+
+
+def provider_profile(provider: Optional[str]) -> ProviderProfile:
+    """Limits for a provider; custom servers use the SEND_* settings"""
+    profile = PROVIDER_PROFILES.get(provider or "")
+    if profile is not None:
+        return profile
+    return ProviderProfile(
+        per_minute=settings.SEND_RATE_PER_MINUTE,
+        per_day=settings.SEND_DAILY_LIMIT,
+        recipients_per_message=settings.SEND_MAX_RECIPIENTS_PER_MESSAGE,
+        burst=max(settings.SEND_RATE_PER_MINUTE // 10, 1),
+    )
+
+
+def refill(tokens: float, refilled_at: float, now: float, profile: ProviderProfile) -> float:
+    """
+    Token bucket level at `now` (one token per message, refilled at
+    per_minute / 60 per second). Without a rate limit the bucket is
+    always full.
+    """
+    if not profile.per_minute:
+        return float("inf")
+    elapsed = max(now - refilled_at, 0.0)
+    return min(float(profile.burst), tokens + elapsed * profile.per_minute / 60.0)
+
+
+def next_day_start(now: datetime) -> datetime:
+    return datetime(now.year, now.month, now.day) + timedelta(days=1)
+
+
+def plan_deferrals(count: int, tokens_left: float, daily_left: Optional[int],
+                   profile: ProviderProfile, now: datetime) -> List[datetime]:
+    """
+    When each of `count` messages that did not get a token may be tried
+    again: spaced at the sustained rate, or at the next UTC day once the
+    daily quota is spent. Spreading them keeps workers from re-claiming
+    (and re-deferring) the whole batch at once.
+    """
+    per_second = profile.per_minute / 60.0
+    tomorrow = next_day_start(now)
+    times = []
+    for idx in range(count):
+        if daily_left is not None and idx >= daily_left:
+            times.append(tomorrow)
+        elif not per_second:
+            # No rate limit: only the daily quota defers
+            times.append(now)
+        else:
+            wait = (idx + 1 - tokens_left) / per_second
+            times.append(now + timedelta(seconds=max(math.ceil(wait), 1)))
+    return times
+
+
+class QuotaGrant(NamedTuple):
+    granted: int
+    retry_at: List[datetime]  # One entry per message that was not granted
+
+
+def split_grant(count: int, tokens: float, daily_left: Optional[int]) -> Tuple[int, float]:
+    """How many of `count` messages may go now, and the tokens left afterwards"""
+    granted = count if math.isinf(tokens) else min(count, max(math.floor(tokens), 0))
+    if daily_left is not None:
+        granted = min(granted, max(daily_left, 0))
+    return granted, tokens - granted
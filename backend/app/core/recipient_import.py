@@ -0,0 +1,231 @@
+"""
+CSV recipient list import - streamed parse, batched address validation
+"""
+import codecs
+import csv
+import functools
+import json
+import multiprocessing
+import re
+import threading
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from email_validator import EmailNotValidError, validate_email
+
+from app.config import settings
+from app.core.recipients import address_key, normalize_address
+
+# Header names recognised as the address column (case-insensitive)
+ADDRESS_COLUMNS = ("email", "e-mail", "email_address", "address")
+
+# Template placeholders are ASCII identifiers (app.core.templating)
+_NON_IDENTIFIER = re.compile(r'\W+', re.ASCII)
+
+
+class RecipientImportError(ValueError):
+    """The CSV cannot be imported (no address column, too many rows...)"""
+
+
+class ImportBatch(NamedTuple):
+    entries: List[Dict]  # {address, address_key, variables} ready to insert
+    invalid: int
+    duplicates: int
+
+
+# RFC 5322 dot-atom local part in plain ASCII - what nearly every list contains
+_SIMPLE_LOCAL_PART = re.compile(r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*")
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalized_domain(domain: str) -> Optional[str]:
+    """Validated, normalized domain - IDNA checks are the expensive part, and lists share few domains"""
+    try:
+        return validate_email(f"postmaster@{domain}", check_deliverability=False).domain
+    except EmailNotValidError:
+        return None
+
+
+def _validate_address(address: str) -> Optional[str]:
+    local, at, domain = address.strip().rpartition("@")
+    if at and len(local) <= 64 and _SIMPLE_LOCAL_PART.fullmatch(local):
+        normalized_domain = _normalized_domain(domain)
+        if normalized_domain is None:
+            return None
+        normalized = f"{local}@{normalized_domain}"
+        return normalized if len(normalized) <= 254 else None
+    # Quoted or internationalized local parts: full check
+    try:
+        result = validate_email(address.strip(), check_deliverability=False)
+    except EmailNotValidError:
+        return None
+    return normalize_address(result.normalized)
+
+
+def validate_addresses(addresses: List[str]) -> List[Optional[str]]:
+    """
+    Normalized form of each address, or None where it is invalid.
+    Same rules as EmailStr (email-validator, no DNS lookups).
+    Module level so it can be pickled to the import pool processes.
+    """
+    return [_validate_address(address) for address in addresses]
+
+
+# Validation is CPU bound: on a process pool it does not hold the GIL the
+# event loop and the other request threads need
+_import_executor: Optional[ProcessPoolExecutor] = None
+_import_executor_lock = threading.Lock()
+
+
+def _get_import_executor() -> ProcessPoolExecutor:
+    global _import_executor
+    with _import_executor_lock:
+        if _import_executor is None:
+            _import_executor = ProcessPoolExecutor(
+                max_workers=settings.RECIPIENT_IMPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _import_executor
+
+
+def shutdown_import_executor():
+    global _import_executor
+    with _import_executor_lock:
+        if _import_executor is not None:
+            _import_executor.shutdown(wait=False, cancel_futures=True)
+            _import_executor = None
+
+
+def variable_names(names: List[str]) -> List[str]:
+    """
+    Template variable names for CSV columns: accents transliterated
+    ("prénom" -> "prenom"), anything else outside [A-Za-z0-9_] replaced,
+    made unique. Columns with nothing usable become column<N>.
+    """
+    result = []
+    seen = set()
+    for idx, name in enumerate(names):
+        ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+        variable = _NON_IDENTIFIER.sub("_", ascii_name).strip("_") or f"column{idx}"
+        if variable[0].isdigit():
+            variable = f"_{variable}"
+        unique, suffix = variable, 2
+        while unique in seen:
+            unique, suffix = f"{variable}_{suffix}", suffix + 1
+        seen.add(unique)
+        result.append(unique)
+    return result
+
+
+def _read_header(rows: Iterator[List[str]]) -> Tuple[int, List[str], Optional[List[str]]]:
+    """
+    (address column index, variable column names, first data row if the
+    file has no header). A file without a recognised header is accepted
+    when its first cell is an address; it then has no variables.
+    """
+    header = next(rows, None)
+    if header is None:
+        raise RecipientImportError("The CSV file is empty")
+
+    names = [cell.strip() for cell in header]
+    for idx, name in enumerate(names):
+        if name.lower() in ADDRESS_COLUMNS:
+            others = [other for other_idx, other in enumerate(names) if other_idx != idx]
+            return idx, variable_names(others), None
+
+    if names and "@" in names[0]:
+        return 0, [], header
+    raise RecipientImportError(f"No address column found (expected one of: {', '.join(ADDRESS_COLUMNS)})")
+
+
+def _batches(rows: Iterator[List[str]], first_row: Optional[List[str]],
+             batch_size: int) -> Iterator[List[List[str]]]:
+    batch = [first_row] if first_row is not None else []
+    for row in rows:
+        if not row:
+            continue
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _validated(batches: Iterator[List[List[str]]], address_idx: int):
+    """
+    (rows, validated addresses) per batch, in order. With import workers a
+    few batches are validated ahead while earlier ones are inserted; only
+    that window is held in memory, never the whole file.
+    """
+    def addresses(batch):
+        return [row[address_idx] if address_idx < len(row) else "" for row in batch]
+
+    if settings.RECIPIENT_IMPORT_WORKERS <= 0:
+        for batch in batches:
+            yield batch, validate_addresses(addresses(batch))
+        return
+
+    executor = _get_import_executor()
+    window = settings.RECIPIENT_IMPORT_WORKERS * 2
+    pending = deque()
+    for batch in batches:
+        pending.append((batch, executor.submit(validate_addresses, addresses(batch))))
+        if len(pending) >= window:
+            batch, future = pending.popleft()
+            yield batch, future.result()
+    while pending:
+        batch, future = pending.popleft()
+        yield batch, future.result()
+
+
+def parse_recipient_csv(stream: BinaryIO) -> Tuple[List[str], Iterator[ImportBatch]]:
+    """
+    Variable column names and a lazy iterator of validated, de-duplicated
+    entry batches for a UTF-8 CSV. The stream is read row by row as the
+    batches are consumed; invalid addresses and repeats are counted, not kept.
+    """
+    rows = csv.reader(codecs.getreader("utf-8-sig")(stream, errors="replace"))
+    try:
+        address_idx, columns, first_row = _read_header(rows)
+    except csv.Error as e:
+        raise RecipientImportError(f"Malformed CSV: {e}")
+
+    def batches() -> Iterator[ImportBatch]:
+        seen = set()
+        validated = _validated(_batches(rows, first_row, settings.RECIPIENT_IMPORT_BATCH_SIZE), address_idx)
+        while True:
+            try:
+                batch, addresses = next(validated)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                raise RecipientImportError(f"Malformed CSV: {e}")
+
+            entries = []
+            invalid = duplicates = 0
+            for row, address in zip(batch, addresses):
+                if address is None:
+                    invalid += 1
+                    continue
+                key = address_key(address)
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                variables = None
+                if columns:
+                    cells = [cell for idx, cell in enumerate(row) if idx != address_idx]
+                    cells += [""] * (len(columns) - len(cells))
+                    variables = json.dumps(dict(zip(columns, cells)))
+                entries.append({"address": address, "address_key": key, "variables": variables})
+
+            if len(seen) > settings.MAX_RECIPIENT_LIST_SIZE:
+                raise RecipientImportError(
+                    f"Recipient lists are limited to {settings.MAX_RECIPIENT_LIST_SIZE} addresses"
+                )
+            yield ImportBatch(entries, invalid, duplicates)
+
+    return columns, batches()
@@ -0,0 +1,57 @@
+"""
+Recipient list clean-up - normalization, de-duplication and suppression filtering
+"""
+from typing import AbstractSet, Iterable, List, NamedTuple, Optional
+
+
+def normalize_address(address: str) -> str:
+    """Trim the address and lower-case its domain (the form that is sent to)"""
+    address = address.strip()
+    local, at, domain = address.rpartition("@")
+    if not at:
+        return address
+    return f"{local}@{domain.lower()}"
+
+
+def address_key(address: str) -> str:
+    """
+    Identity of an address for de-duplication and suppression: fully
+    case-folded, since providers treat local parts case-insensitively
+    """
+    return address.strip().casefold()
+
+
+class CleanRecipients(NamedTuple):
+    to: List[str]
+    cc: List[str]
+    bcc: List[str]
+    duplicates: int
+    suppressed: int
+
+
+def clean_recipients(to: Iterable[str], cc: Optional[Iterable[str]] = None,
+                     bcc: Optional[Iterable[str]] = None,
+                     suppressed: AbstractSet[str] = frozenset()) -> CleanRecipients:
+    """
+    Normalize to/cc/bcc, keep each address once (to wins over cc, cc over
+    bcc) and drop addresses whose key is in `suppressed`. One pass with set
+    lookups, so it stays linear for very large 'to' lists.
+    """
+    seen = set()
+    duplicates = dropped = 0
+    cleaned: List[List[str]] = []
+    for addresses in (to, cc or (), bcc or ()):
+        kept = []
+        for address in addresses:
+            key = address_key(address)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            if key in suppressed:
+                dropped += 1
+                continue
+            kept.append(normalize_address(address))
+        cleaned.append(kept)
+    return CleanRecipients(cleaned[0], cleaned[1], cleaned[2], duplicates, dropped)
+
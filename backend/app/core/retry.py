@@ -0,0 +1,78 @@
+"""
+Send retries - transient/permanent classification of SMTP failures and backoff
+"""
+import random
+import smtplib
+import socket
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.config import settings
+from app.core.smtp_pool import SMTPPoolTimeout, smtp_reply_code
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+# Failures without a reply code that say nothing about the recipient:
+# the connection or the session went away before the server answered
+TRANSIENT_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    SMTPPoolTimeout,
+    socket.timeout,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def classify_error(exc: Exception, smtp_code: Optional[int] = None) -> str:
+    """
+    TRANSIENT for 4xx replies and network failures, PERMANENT for 5xx
+    replies and anything else (bad credentials, unreadable attachment...)
+    """
+    code = smtp_code if smtp_code is not None else smtp_reply_code(exc)
+    if code is not None and 400 <= code < 500:
+        return TRANSIENT
+    if code is not None and code >= 500:
+        return PERMANENT
+    if isinstance(exc, TRANSIENT_ERRORS):
+        return TRANSIENT
+    return PERMANENT
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Seconds to wait before attempt `attempt + 1`: doubling from
+    SEND_RETRY_BASE_DELAY up to SEND_RETRY_MAX_DELAY, with the lower half
+    jittered so recipients that failed together do not retry together.
+    """
+    delay = min(settings.SEND_RETRY_BASE_DELAY * 2 ** max(attempt - 1, 0), settings.SEND_RETRY_MAX_DELAY)
+    return random.uniform(delay / 2, delay)
+
+
+def next_attempt_at(attempts: int, now: Optional[datetime] = None) -> Optional[datetime]:
+    """When a delivery that failed its `attempts`-th try goes again, or None when out of attempts"""
+    if attempts >= settings.SEND_MAX_ATTEMPTS:
+        return None
+    return (now or datetime.utcnow()) + timedelta(seconds=backoff_delay(attempts))
+
+
+def throttled_attempt_at(attempts: int, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    When a delivery the provider throttled (421/454) on its `attempts`-th
+    try goes again: after SEND_THROTTLE_BACKOFF, or None when out of
+    attempts, so a server that never stops throttling ends it as failed
+    """
+    if attempts >= settings.SEND_MAX_ATTEMPTS:
+        return None
+    return (now or datetime.utcnow()) + timedelta(seconds=settings.SEND_THROTTLE_BACKOFF)
+
+# Recipient refusals that mean the mailbox does not exist or cannot exist
+# (550 mailbox unavailable, 551 user not local, 553 mailbox name not allowed)
+HARD_BOUNCE_CODES = frozenset({550, 551, 553})
+
+
+def is_hard_bounce(exc: Exception, smtp_code: Optional[int] = None) -> bool:
+    """True when the server refused the recipient address itself - worth suppressing"""
+    code = smtp_code if smtp_code is not None else smtp_reply_code(exc)
+    return isinstance(exc, smtplib.SMTPRecipientsRefused) and code in HARD_BOUNCE_CODES
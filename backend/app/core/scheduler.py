@@ -0,0 +1,88 @@
+"""
+Due-time scheduler - idle send workers sleep until the next queued delivery is due
+"""
+import heapq
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+
+class DueTimes:
+    """
+    Min-heap of upcoming due times (UTC) of queued deliveries. Holds the
+    next window read from the database plus whatever this process queues
+    or re-queues, so an idle worker waits for the earliest one instead of
+    polling. add() wakes waiting workers when the new time comes first.
+
+    Times queued by other processes are only seen on the next refill;
+    workers bound their wait (WORKER_POLL_INTERVAL) to pick those up.
+    """
+
+    def __init__(self):
+        self._heap: List[datetime] = []
+        self._known = set()
+        self._cond = threading.Condition()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Read before checking the queue; wait() returns at once if anything was added since"""
+        return self._generation
+
+    def add(self, due_at: datetime):
+        with self._cond:
+            if due_at in self._known:
+                return
+            self._drop_past(datetime.utcnow())
+            self._known.add(due_at)
+            heapq.heappush(self._heap, due_at)
+            if self._heap[0] == due_at:
+                # Earlier than what the workers are waiting for
+                self._generation += 1
+                self._cond.notify_all()
+
+    def refill(self, due_times: Iterable[datetime]):
+        """Merge the next window of due times read from the database (no wake-up)"""
+        with self._cond:
+            for due_at in due_times:
+                if due_at not in self._known:
+                    self._known.add(due_at)
+                    heapq.heappush(self._heap, due_at)
+
+    def wake(self):
+        """Wake every waiting worker (shutdown)"""
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+    def _drop_past(self, now: datetime):
+        while self._heap and self._heap[0] <= now:
+            self._known.discard(heapq.heappop(self._heap))
+
+    def next_due(self) -> Optional[datetime]:
+        """Earliest due time still in the future, None when none is known"""
+        with self._cond:
+            self._drop_past(datetime.utcnow())
+            return self._heap[0] if self._heap else None
+
+    def wait(self, generation: int, max_wait: float):
+        """
+        Sleep until the next due time, an add() or max_wait seconds.
+        Call with the generation read before the queue was found empty.
+        """
+        with self._cond:
+            if self._generation != generation:
+                return
+            now = datetime.utcnow()
+            self._drop_past(now)
+            timeout = max_wait
+            if self._heap:
+                timeout = min(timeout, (self._heap[0] - now).total_seconds())
+            self._cond.wait(max(timeout, 0))
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+
+due_times = DueTimes()
@@ -1,30 +1,96 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.core.metrics import PASSWORD_HASH_DURATION, observe
 from app.schemas.user import TokenData
 
 # 🔥 REPLACE BCRYPT WITH ARGON2 (NO 72-BYTE LIMIT!)
+# Parameters come from settings; hashes made with older parameters are
+# upgraded on the next successful login (see verify_and_update_password).
 pwd_context = CryptContext(
     schemes=["argon2"],  # Argon2 has NO byte limit!
     deprecated="auto",
     
-    # Optimized for development (fast but secure)
-    argon2__time_cost=2,          # Number of iterations
-    argon2__memory_cost=102400,   # Memory usage (100MB)
-    argon2__parallelism=8,        # Parallel threads
+    argon2__time_cost=settings.ARGON2_TIME_COST,      # Number of iterations
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,  # Memory usage in KiB
+    argon2__parallelism=settings.ARGON2_PARALLELISM,  # Parallel threads
     argon2__salt_len=16,          # Salt length
     argon2__hash_len=32,          # Hash length
 )
 
+class HashingBusyError(Exception):
+    """Too many password hashes queued - the caller should retry later"""
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing capacity exhausted")
+        self.retry_after = retry_after
+
+# Argon2 is CPU and memory heavy: run it on a small process pool so a burst
+# of logins cannot take over the request threadpool or allocate
+# memory_cost x (number of threads) at once. Workers + queued jobs is capped.
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(
+    max(settings.HASH_POOL_WORKERS, 1) + settings.HASH_QUEUE_LIMIT
+)
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=settings.HASH_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_executor
+
+def shutdown_hash_executor():
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False, cancel_futures=True)
+            _hash_executor = None
+
+def _run_hashing(fn, *args):
+    """Run fn on the hashing pool, or fail fast when the queue is full"""
+    if not _hash_slots.acquire(blocking=False):
+        raise HashingBusyError(retry_after=settings.HASH_RETRY_AFTER)
+    try:
+        with observe(PASSWORD_HASH_DURATION, fn.__name__.lstrip("_")):
+            if settings.HASH_POOL_WORKERS <= 0:
+                return fn(*args)
+            return _get_hash_executor().submit(fn, *args).result()
+    finally:
+        _hash_slots.release()
+
+# Module level so they can be pickled to the pool processes
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     """Hash a password using Argon2 - NO 72-BYTE LIMIT!"""
-    return pwd_context.hash(password)
+    return _run_hashing(_hash, password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against an Argon2 hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _run_hashing(_verify, plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password; if the hash was made with outdated Argon2 parameters
+    also return a fresh hash to store (None otherwise).
+    """
+    return _run_hashing(_verify_and_update, plain_password, hashed_password)
 
 # JWT functions (unchanged)
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
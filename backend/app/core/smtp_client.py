@@ -1,149 +1,310 @@
 """
-SMTP Client for sending emails - COMPLETELY FIXED VERSION
+SMTP client - messages prepared once and sent per recipient over pooled sessions
+
+Sessions come from app.core.smtp_pool: one pool per sender account, idle
+sessions checked with NOOP before reuse, and a send that hits a dropped
+session or a 421 reply retried once on a fresh one.
 """
-import smtplib
-from email.mime.multipart import MIMEMultipart
+import logging
+import re
+import uuid
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
-from typing import List, Optional, Dict, Any
+from email.policy import SMTP as SMTP_POLICY
+from typing import List, Optional, Dict, Any, Tuple
 import base64
-from email.utils import make_msgid
+from email.utils import make_msgid, formatdate
+
+from app.config import settings
+from app.core.attachment_store import attachment_store
+from app.core.smtp_pool import SMTPConnectionPool, get_smtp_pool
+from app.core.templating import CompiledTemplate, compile_template, header_safe
+
+logger = logging.getLogger(__name__)
+
+
+class AttachmentUnavailableError(ValueError):
+    """A stored attachment the message references cannot be read"""
+
+# SMTP transparency (RFC 5321 4.5.2): lines starting with '.' get an extra '.'
+_DOT_LINE = re.compile(rb'^\.', re.MULTILINE)
+
+
+def _header(name: str, value: str) -> bytes:
+    """Fold and encode a single header line for the wire"""
+    return SMTP_POLICY.header_factory(name, value).fold(policy=SMTP_POLICY).encode('ascii')
+
+
+_STUFFED_DOT_LINE = re.compile(rb'^\.\.', re.MULTILINE)
+
+
+def _dot_stuff(data: bytes) -> bytes:
+    return _DOT_LINE.sub(b'..', data)
+
+
+def _dot_unstuff(data: bytes) -> bytes:
+    return _STUFFED_DOT_LINE.sub(b'.', data)
+
+
+class PreparedMessage:
+    """
+    A message rendered to wire bytes once and reused for many recipients.
+
+    Only the To/Cc/Date/Message-ID headers are produced per recipient; the
+    rest of the headers, the body and every attachment part are serialized,
+    base64-encoded and dot-stuffed a single time in SMTPClient.prepare_message.
+    """
+
+    def __init__(self, sender: str, static_headers: bytes, body: bytes):
+        self.sender = sender
+        self.static_headers = static_headers
+        self.body = body
+        self._msgid_domain = sender.rsplit('@', 1)[-1] or None
+
+    def recipient_headers(self, to_email: List[str],
+                          cc_email: Optional[List[str]] = None) -> Tuple[bytes, str]:
+        """Per-recipient header block and the Message-ID it carries"""
+        message_id = make_msgid(domain=self._msgid_domain)
+        headers = [_header('To', ', '.join(to_email))]
+        if cc_email:
+            headers.append(_header('Cc', ', '.join(cc_email)))
+        headers.append(_header('Date', formatdate(localtime=True)))
+        headers.append(_header('Message-ID', message_id))
+        return b''.join(headers), message_id
+
+    def content(self, variables: Optional[Dict[str, str]] = None) -> Tuple[bytes, List[bytes]]:
+        """Headers and body chunks that do not depend on the recipient's address"""
+        return self.static_headers, [self.body]
+
+    def chunks(self, to_email: List[str], cc_email: Optional[List[str]] = None,
+               variables: Optional[Dict[str, str]] = None) -> Tuple[List[bytes], str]:
+        """Wire chunks (already CRLF terminated and dot-stuffed) for one send"""
+        headers, message_id = self.recipient_headers(to_email, cc_email)
+        static_headers, body = self.content(variables)
+        return [headers, static_headers, *body], message_id
+
+    def as_bytes(self, to_email: List[str], cc_email: Optional[List[str]] = None,
+                 variables: Optional[Dict[str, str]] = None) -> bytes:
+        """Full message as it goes on the wire (useful for debugging)"""
+        chunks, _ = self.chunks(to_email, cc_email, variables)
+        return b''.join(chunks)
+
+    def message_bytes(self, to_email: List[str], cc_email: Optional[List[str]] = None,
+                      variables: Optional[Dict[str, str]] = None) -> Tuple[bytes, str]:
+        """Message without SMTP dot-stuffing, for clients that stuff it themselves"""
+        headers, message_id = self.recipient_headers(to_email, cc_email)
+        static_headers, body = self.content(variables)
+        return headers + static_headers + _dot_unstuff(b''.join(body)), message_id
+
+
+class TemplatedMessage(PreparedMessage):
+    """
+    A PreparedMessage whose subject and text part are rendered per recipient
+    from compiled templates. The attachment parts and closing boundary
+    (`body`) are still encoded and dot-stuffed once and shared by every render.
+    """
+
+    def __init__(self, sender: str, static_headers: bytes, body: bytes,
+                 subject: CompiledTemplate, text: CompiledTemplate, is_html: bool,
+                 text_head: bytes):
+        super().__init__(sender, static_headers, body)
+        self.subject = subject
+        self.text = text
+        self.is_html = is_html
+        # Leading boundary plus the text part's headers
+        self.text_head = text_head
+
+    def content(self, variables: Optional[Dict[str, str]] = None) -> Tuple[bytes, List[bytes]]:
+        values = variables or {}
+        subject = _header('Subject', self.subject.render(header_safe(values)))
+        text = self.text.render(values, escape_html=self.is_html).encode('utf-8')
+        # Base64 lines never start with '.', so the rendered part needs no dot-stuffing
+        encoded = base64.encodebytes(text).replace(b'\n', b'\r\n')
+        return subject + self.static_headers, [self.text_head, encoded, self.body]
+
 
 class SMTPClient:
-    def __init__(self, smtp_host: str, smtp_port: int, 
-                 username: str, password: str, use_tls: bool = True):
+    def __init__(self, smtp_host: str, smtp_port: int,
+                 username: str, password: str, use_tls: bool = True,
+                 max_sessions: Optional[int] = None):
         self.smtp_host = smtp_host
         self.smtp_port = smtp_port
         self.username = username
         self.password = password
         self.use_tls = use_tls
-        
-    def send_email(self, to_email: List[str], subject: str, body: str, 
-                   is_html: bool = False, cc_email: Optional[List[str]] = None,
-                   bcc_email: Optional[List[str]] = None,
-                   attachments: Optional[List[Dict[str, Any]]] = None) -> str:
+        self.max_sessions = max_sessions
+
+    @classmethod
+    def from_config(cls, config) -> "SMTPClient":
+        """Build a client from resolved sender settings (EmailConfigCRUD.get_smtp_settings)"""
+        return cls(
+            smtp_host=config.smtp_host or "smtp.gmail.com",
+            smtp_port=config.smtp_port or 587,
+            username=config.email_address,
+            password=config.password,
+            use_tls=config.use_tls,
+            max_sessions=config.max_parallel_sessions or settings.SMTP_POOL_MAX_SESSIONS
+        )
+
+    @property
+    def pool(self) -> SMTPConnectionPool:
+        """Shared session pool for this sender account"""
+        return get_smtp_pool(self.smtp_host, self.smtp_port,
+                             self.username, self.password, self.use_tls,
+                             max_sessions=self.max_sessions)
+
+    @staticmethod
+    def build_attachment_part(attachment: Dict[str, Any], idx: int = 0) -> Optional[bytes]:
+        """
+        Decode one attachment dict (inline base64_content or a store
+        handle) and render it as a MIME part.
+        Returns None if an inline attachment has no usable content; raises
+        AttachmentUnavailableError when a stored upload cannot be read, so
+        the message is never sent without it.
+        """
+        filename = attachment.get('filename', f'attachment_{idx}')
+        content_type = attachment.get('content_type', 'application/octet-stream')
+        base64_content = attachment.get('base64_content', '')
+        handle = attachment.get('handle')
+
+        if not base64_content and not handle:
+            logger.warning("Skipping attachment %s: no content", filename)
+            return None
+
+        # Clean filename
+        filename = filename.replace('\n', '').replace('\r', '')
+
+        maintype, subtype = content_type.split('/', 1) if '/' in content_type else ('application', 'octet-stream')
+
+        if handle:
+            # Stored upload: reuse the base64 body cached next to the blob
+            mime_part = MIMEBase(maintype, subtype)
+            mime_part.add_header(
+                'Content-Disposition',
+                'attachment',
+                filename=filename
+            )
+            mime_part['Content-Transfer-Encoding'] = 'base64'
+            mime_part.set_payload('')
+            try:
+                encoded = attachment_store.read_encoded(handle)
+            except (OSError, ValueError) as e:
+                raise AttachmentUnavailableError(f"Attachment {filename} is not available") from e
+            return mime_part.as_bytes(policy=SMTP_POLICY) + encoded
+
+        try:
+            file_data = base64.b64decode(base64_content)
+        except Exception as e:
+            logger.warning("Skipping attachment %s: base64 decode failed: %s", filename, e)
+            return None
+
+        mime_part = MIMEBase(maintype, subtype)
+        mime_part.set_payload(file_data)
+        encoders.encode_base64(mime_part)
+        mime_part.add_header(
+            'Content-Disposition',
+            'attachment',
+            filename=filename
+        )
+        return mime_part.as_bytes(policy=SMTP_POLICY)
+
+    def prepare_message(self, subject: str, body: str, is_html: bool = False,
+                        attachments: Optional[List[Dict[str, Any]]] = None,
+                        templated: bool = False) -> PreparedMessage:
+        """
+        Render subject, body and attachments once so the result can be sent
+        to any number of recipients without re-encoding anything.
+        With templated=True subject and body are {{variable}} templates and
+        a TemplatedMessage is returned; only those two are rendered per send.
+        """
+        boundary = f"=_{uuid.uuid4().hex}"
+        delimiter = b'--' + boundary.encode('ascii')
+
+        static_headers = b''.join([
+            _header('From', self.username),
+            *([] if templated else [_header('Subject', subject)]),
+            _header('MIME-Version', '1.0'),
+            _header('Content-Type', f'multipart/mixed; boundary="{boundary}"'),
+        ])
+
+        parts = [] if templated else [
+            MIMEText(body, 'html' if is_html else 'plain').as_bytes(policy=SMTP_POLICY)
+        ]
+
+        if attachments:
+            for idx, attachment in enumerate(attachments):
+                part = self.build_attachment_part(attachment, idx)
+                if part is not None:
+                    parts.append(part)
+
+        sections = [] if templated else [b'\r\n']
+        for part in parts:
+            sections.extend([delimiter, b'\r\n', part])
+            if not part.endswith(b'\r\n'):
+                sections.append(b'\r\n')
+        sections.extend([delimiter, b'--\r\n'])
+
+        if templated:
+            text_head = b''.join([
+                b'\r\n', delimiter, b'\r\n',
+                _header('Content-Type', f'text/{"html" if is_html else "plain"}; charset="utf-8"'),
+                _header('Content-Transfer-Encoding', 'base64'),
+                b'\r\n',
+            ])
+            return TemplatedMessage(
+                sender=self.username,
+                static_headers=static_headers,
+                body=_dot_stuff(b''.join(sections)),
+                subject=compile_template(subject),
+                text=compile_template(body),
+                is_html=is_html,
+                text_head=text_head,
+            )
+
+        return PreparedMessage(
+            sender=self.username,
+            static_headers=static_headers,
+            body=_dot_stuff(b''.join(sections)),
+        )
+
+    def send_prepared(self, prepared: PreparedMessage, to_email: List[str],
+                      cc_email: Optional[List[str]] = None,
+                      bcc_email: Optional[List[str]] = None,
+                      variables: Optional[Dict[str, str]] = None) -> str:
         """
-        Send an email with attachments - FIXED VERSION
+        Send a prepared message; only the per-recipient headers (and, for a
+        TemplatedMessage, the rendered subject and text) are built here.
         Returns: Message ID
         """
-        print(f"\n📤 ===== SMTP CLIENT: SEND EMAIL START =====")
-        print(f"   From: {self.username}")
-        print(f"   To: {to_email}")
-        print(f"   Subject: {subject}")
-        print(f"   Body length: {len(body)}")
-        print(f"   Attachments: {len(attachments) if attachments else 0}")
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = self.username
-        msg['To'] = ', '.join(to_email)
-        
-        if cc_email:
-            msg['Cc'] = ', '.join(cc_email)
-        
-        msg['Subject'] = subject
-        msg['Message-ID'] = make_msgid()
-        
-        # All recipients
-        all_recipients = to_email.copy()
+        all_recipients = list(to_email)
         if cc_email:
             all_recipients.extend(cc_email)
         if bcc_email:
             all_recipients.extend(bcc_email)
-        
-        # Add email body
-        print(f"   📝 Adding body...")
-        if is_html:
-            msg.attach(MIMEText(body, 'html'))
-        else:
-            msg.attach(MIMEText(body, 'plain'))
-        
-        # ✅ FIXED: Add attachments with proper error handling
-        if attachments and len(attachments) > 0:
-            print(f"   📎 Processing {len(attachments)} attachments...")
-            
-            for idx, attachment in enumerate(attachments):
-                filename = "unknown_file"
-                try:
-                    filename = attachment.get('filename', f'attachment_{idx}')
-                    content_type = attachment.get('content_type', 'application/octet-stream')
-                    base64_content = attachment.get('base64_content', '')
-                    
-                    print(f"   📄 Attachment {idx+1}: {filename}")
-                    
-                    if not base64_content:
-                        print(f"   ⚠️ Skipping: No base64 content")
-                        continue
-                    
-                    # Clean filename
-                    filename = filename.replace('\n', '').replace('\r', '')
-                    
-                    # Decode base64
-                    print(f"   🔍 Decoding base64 ({len(base64_content)} chars)...")
-                    try:
-                        file_data = base64.b64decode(base64_content)
-                        print(f"   ✅ Decoded: {len(file_data)} bytes")
-                    except Exception as e:
-                        print(f"   ❌ Base64 decode failed: {e}")
-                        continue
-                    
-                    # Create MIME part
-                    maintype, subtype = content_type.split('/', 1) if '/' in content_type else ('application', 'octet-stream')
-                    
-                    print(f"   🛠️ Creating MIME part: {maintype}/{subtype}")
-                    mime_part = MIMEBase(maintype, subtype)
-                    mime_part.set_payload(file_data)
-                    
-                    # Encode and set headers
-                    encoders.encode_base64(mime_part)
-                    mime_part.add_header(
-                        'Content-Disposition',
-                        'attachment',
-                        filename=filename
-                    )
-                    
-                    # Add to message
-                    msg.attach(mime_part)
-                    print(f"   ✅ Added: {filename}")
-                    
-                except Exception as e:
-                    print(f"   ❌ Error adding attachment {filename}: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-        else:
-            print(f"   ℹ️ No attachments to add")
-        
-        # Connect to SMTP server and send
-        print(f"   🔗 Connecting to SMTP: {self.smtp_host}:{self.smtp_port}")
-        
+
+        chunks, message_id = prepared.chunks(to_email, cc_email, variables)
+        # A refused 'to' fails the send; refused cc/bcc copies do not
+        refused = self.pool.sendmail(self.username, all_recipients, chunks, required=to_email)
+        if refused:
+            logger.warning("Recipients refused: %s", ", ".join(refused), extra={"message_id": message_id})
+        return message_id
+
+    def send_email(self, to_email: List[str], subject: str, body: str,
+                   is_html: bool = False, cc_email: Optional[List[str]] = None,
+                   bcc_email: Optional[List[str]] = None,
+                   attachments: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        Send an email with attachments
+        Returns: Message ID
+        """
+        prepared = self.prepare_message(subject, body, is_html, attachments)
+
         try:
-            server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=30)
-            print(f"   ⚡ Connection established")
-            
-            if self.use_tls:
-                print(f"   🔒 Starting TLS...")
-                server.starttls()
-                print(f"   ✅ TLS enabled")
-            
-            print(f"   🔑 Logging in as: {self.username}")
-            server.login(self.username, self.password)
-            print(f"   ✅ Login successful")
-            
-            print(f"   📤 Sending email to {len(all_recipients)} recipients...")
-            server.send_message(msg)
-            print(f"   ✅ Email sent successfully!")
-            
-            # Close connection
-            server.quit()
-            print(f"   🔌 Connection closed")
-            
-            # Extract message ID
-            message_id = msg.get('Message-ID', '')
-            return message_id
-            
-        except Exception as e:
-            print(f"   ❌ SMTP Error: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            raise
\ No newline at end of file
+            message_id = self.send_prepared(prepared, to_email, cc_email, bcc_email)
+        except Exception:
+            logger.exception("SMTP send from %s failed", self.username,
+                             extra={"recipients": len(to_email)})
+            raise
+        logger.debug("Sent %s", message_id, extra={"recipients": len(to_email)})
+        return message_id
@@ -0,0 +1,300 @@
+"""
+SMTP connection pool - keeps authenticated sessions open per sender account
+"""
+import smtplib
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.core.metrics import SMTP_PHASE_DURATION, observe
+
+# Errors that mean the session is dead and the message can be retried on a fresh one
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class SMTPPoolTimeout(smtplib.SMTPException):
+    """Raised when no pooled session becomes available in time"""
+
+
+def _is_service_closing(exc: Exception) -> bool:
+    """True for 421 'service not available, closing channel' replies"""
+    if getattr(exc, 'smtp_code', None) == 421:
+        return True
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return any(code == 421 for code, _ in exc.recipients.values())
+    return False
+
+
+def smtp_reply_code(exc: Exception) -> Optional[int]:
+    """The SMTP reply code carried by an smtplib exception, if any"""
+    code = getattr(exc, 'smtp_code', None)
+    if code is None and isinstance(exc, smtplib.SMTPRecipientsRefused) and exc.recipients:
+        code = next(iter(exc.recipients.values()))[0]
+    return code
+
+
+class PooledSMTPConnection:
+    """An authenticated SMTP session plus its bookkeeping"""
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.messages_sent = 0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def close(self):
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+
+class SMTPConnectionPool:
+    """
+    Bounded pool of authenticated SMTP sessions for one sender account.
+
+    Sessions are health-checked with NOOP after being idle, dropped after
+    max_messages_per_session messages and transparently replaced when the
+    server disconnects or answers 421.
+    """
+
+    def __init__(self, smtp_host: str, smtp_port: int, username: str, password: str,
+                 use_tls: bool = True, max_sessions: Optional[int] = None,
+                 max_messages_per_session: Optional[int] = None,
+                 idle_timeout: Optional[int] = None, timeout: Optional[int] = None):
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_sessions = max_sessions or settings.SMTP_POOL_MAX_SESSIONS
+        self.max_messages_per_session = max_messages_per_session or settings.SMTP_MAX_MESSAGES_PER_SESSION
+        self.idle_timeout = idle_timeout or settings.SMTP_POOL_IDLE_TIMEOUT
+        self.timeout = timeout or settings.SMTP_TIMEOUT
+
+        self._idle: deque = deque()
+        self._open_sessions = 0
+        self._cond = threading.Condition()
+
+    # ----- session lifecycle -----
+
+    def _connect(self) -> PooledSMTPConnection:
+        with observe(SMTP_PHASE_DURATION, "connect"):
+            server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                with observe(SMTP_PHASE_DURATION, "starttls"):
+                    server.starttls()
+            with observe(SMTP_PHASE_DURATION, "login"):
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        return PooledSMTPConnection(server)
+
+    def _is_healthy(self, conn: PooledSMTPConnection) -> bool:
+        idle_for = time.monotonic() - conn.last_used
+        if idle_for > self.idle_timeout:
+            return False
+        if idle_for < settings.SMTP_NOOP_AFTER_IDLE:
+            return True
+        try:
+            with observe(SMTP_PHASE_DURATION, "noop"):
+                code, _ = conn.server.noop()
+            return code == 250
+        except Exception:
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledSMTPConnection:
+        """Check out a healthy session, opening a new one if the pool has room"""
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        while True:
+            with self._cond:
+                conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    if self._open_sessions < self.max_sessions:
+                        self._open_sessions += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise SMTPPoolTimeout(
+                            f"No SMTP session available for {self.username} after waiting"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            # Health check outside the lock - NOOP is a network round-trip
+            if self._is_healthy(conn):
+                return conn
+            conn.close()
+            self._forget()
+
+        try:
+            return self._connect()
+        except Exception:
+            self._forget()
+            raise
+
+    def release(self, conn: PooledSMTPConnection, discard: bool = False):
+        """Return a session to the pool, or close it if it is spent or broken"""
+        conn.last_used = time.monotonic()
+        if not discard and conn.messages_sent < self.max_messages_per_session:
+            with self._cond:
+                if self._open_sessions <= self.max_sessions:
+                    self._idle.append(conn)
+                    self._cond.notify()
+                    return
+        conn.close()
+        self._forget()
+
+    def _forget(self):
+        with self._cond:
+            self._open_sessions -= 1
+            self._cond.notify()
+
+    def resize(self, max_sessions: int):
+        """Change the session cap; extra sessions close as they are released"""
+        with self._cond:
+            self.max_sessions = max_sessions
+            self._cond.notify_all()
+
+    def close_all(self):
+        """Close every idle session (checked-out sessions close on release)"""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open_sessions -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
+
+    # ----- sending -----
+
+    def sendmail(self, from_addr: str, to_addrs: List[str], msg,
+                 required: Sequence[str] = ()) -> Dict:
+        """
+        Send a message on a pooled session. msg may be bytes/str (plain
+        sendmail), a list of pre-rendered wire chunks (see send_chunks) or a
+        Message object. A dropped session or a 421 reply is retried once on a
+        freshly opened session. `required` applies to chunks only.
+        """
+        for attempt in range(2):
+            conn = self.acquire()
+            try:
+                if isinstance(msg, (bytes, str)):
+                    refused = conn.server.sendmail(from_addr, to_addrs, msg)
+                elif isinstance(msg, (list, tuple)):
+                    refused = send_chunks(conn.server, from_addr, to_addrs, msg, required)
+                else:
+                    refused = conn.server.send_message(msg, from_addr, to_addrs)
+            except Exception as e:
+                self.release(conn, discard=True)
+                if attempt == 0 and (isinstance(e, RECONNECT_ERRORS) or _is_service_closing(e)):
+                    continue
+                raise
+            conn.messages_sent += 1
+            self.release(conn)
+            return refused
+
+
+def _rset(server: smtplib.SMTP):
+    """RSET that tolerates a server which already hung up"""
+    try:
+        server.rset()
+    except smtplib.SMTPServerDisconnected:
+        pass
+
+
+def send_chunks(server: smtplib.SMTP, from_addr: str, to_addrs: List[str],
+                chunks: List[bytes], required: Sequence[str] = ()) -> Dict:
+    """
+    Same envelope handling as smtplib.SMTP.sendmail, but DATA is written
+    straight from chunks that are already CRLF terminated and dot-stuffed.
+    smtplib would otherwise re-scan the whole message (including large
+    attachments) with regexes on every send.
+    If any `required` recipient is refused nothing is sent (the others,
+    e.g. cc/bcc copies, would otherwise get a message its 'to' never did).
+    """
+    envelope_started = time.perf_counter()
+    server.ehlo_or_helo_if_needed()
+    code, resp = server.mail(from_addr)
+    if code != 250:
+        if code == 421:
+            server.close()
+        else:
+            _rset(server)
+        raise smtplib.SMTPSenderRefused(code, resp, from_addr)
+
+    refused = {}
+    for addr in to_addrs:
+        code, resp = server.rcpt(addr)
+        if code not in (250, 251):
+            refused[addr] = (code, resp)
+        if code == 421:
+            server.close()
+            raise smtplib.SMTPRecipientsRefused(refused)
+    if len(refused) == len(to_addrs):
+        _rset(server)
+        raise smtplib.SMTPRecipientsRefused(refused)
+    refused_required = {addr: refused[addr] for addr in required if addr in refused}
+    if refused_required:
+        _rset(server)
+        raise smtplib.SMTPRecipientsRefused(refused_required)
+
+    data_started = time.perf_counter()
+    SMTP_PHASE_DURATION.labels("envelope").observe(data_started - envelope_started)
+
+    server.putcmd("data")
+    code, resp = server.getreply()
+    if code != 354:
+        _rset(server)
+        raise smtplib.SMTPDataError(code, resp)
+    for chunk in chunks:
+        server.send(chunk)
+    server.send(b".\r\n")
+    code, resp = server.getreply()
+    SMTP_PHASE_DURATION.labels("data").observe(time.perf_counter() - data_started)
+    if code != 250:
+        if code == 421:
+            server.close()
+        else:
+            _rset(server)
+        raise smtplib.SMTPDataError(code, resp)
+    return refused
+
+
+_pools: Dict[Tuple[str, int, str, bool], SMTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_smtp_pool(smtp_host: str, smtp_port: int, username: str,
+                  password: str, use_tls: bool = True,
+                  max_sessions: Optional[int] = None) -> SMTPConnectionPool:
+    """Get (or create) the process-wide pool for a sender account"""
+    key = (smtp_host, smtp_port, username, use_tls)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SMTPConnectionPool(smtp_host, smtp_port, username, password, use_tls,
+                                      max_sessions=max_sessions)
+            _pools[key] = pool
+            return pool
+        if max_sessions and pool.max_sessions != max_sessions:
+            pool.resize(max_sessions)
+        if pool.password != password:
+            # Credentials changed - new sessions must log in with the new password
+            pool.password = password
+            pool.close_all()
+        return pool
+
+
+def close_all_pools():
+    """Close idle sessions of every pool (used on shutdown)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
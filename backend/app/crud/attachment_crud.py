@@ -0,0 +1,75 @@
+"""
+CRUD operations for uploaded attachments
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import desc
+from typing import List, Optional
+from app.models.attachment import Attachment
+
+class AttachmentCRUD:
+    
+    @staticmethod
+    def create(db: Session, user_id: int, sha256: str, filename: str,
+               content_type: str, size_bytes: int) -> Attachment:
+        """Register an upload; the same file under the same name returns the existing row"""
+        existing = db.query(Attachment).filter(
+            Attachment.user_id == user_id,
+            Attachment.sha256 == sha256,
+            Attachment.filename == filename,
+            Attachment.content_type == content_type
+        ).first()
+        if existing:
+            return existing
+        
+        attachment = Attachment(
+            user_id=user_id,
+            sha256=sha256,
+            filename=filename,
+            content_type=content_type,
+            size_bytes=size_bytes
+        )
+        db.add(attachment)
+        db.commit()
+        db.refresh(attachment)
+        return attachment
+    
+    @staticmethod
+    def get_user_attachments(db: Session, user_id: int, attachment_ids: List[int]) -> List[Attachment]:
+        """The user's attachments with these ids, in the requested order"""
+        rows = db.query(Attachment).filter(
+            Attachment.user_id == user_id,
+            Attachment.id.in_(attachment_ids)
+        ).all()
+        by_id = {row.id: row for row in rows}
+        return [by_id[attachment_id] for attachment_id in attachment_ids if attachment_id in by_id]
+    
+    @staticmethod
+    def list_user_attachments(db: Session, user_id: int, skip: int = 0, limit: int = 50) -> List[Attachment]:
+        return db.query(Attachment)\
+            .filter(Attachment.user_id == user_id)\
+            .order_by(desc(Attachment.id))\
+            .offset(skip)\
+            .limit(limit)\
+            .all()
+    
+    @staticmethod
+    def delete(db: Session, user_id: int, attachment_id: int) -> Optional[str]:
+        """
+        Delete one of the user's attachments.
+        Returns its sha256 if no other row still references that content
+        (the caller may then drop the blob), "" if it is still shared,
+        None if the attachment was not found.
+        """
+        attachment = db.query(Attachment).filter(
+            Attachment.id == attachment_id,
+            Attachment.user_id == user_id
+        ).first()
+        if not attachment:
+            return None
+        
+        sha256 = attachment.sha256
+        db.delete(attachment)
+        db.commit()
+        
+        still_used = db.query(Attachment.id).filter(Attachment.sha256 == sha256).first()
+        return "" if still_used else sha256
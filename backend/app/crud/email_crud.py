@@ -2,16 +2,96 @@
 CRUD operations for Email
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import Optional, List
+from sqlalchemy import desc, func, or_, and_, insert, select, literal, null, TIMESTAMP
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, NamedTuple
 from app.models.user_secret import UserSecret
 from app.models.email_log import EmailLog
+from app.models.email_delivery import EmailDelivery
+from app.models.campaign_attachment import CampaignAttachment
+from app.models.recipient_list import RecipientListEntry
 from app.schemas.email_config import EmailConfigCreate, EmailConfigUpdate
-from app.core.encryption import encrypt_password, decrypt_password
+from app.core.encryption import encrypt_password, decrypt_password_for_rotation
+from app.core.cache import TTLCache
+from app.crud.recipient_list_crud import RecipientListCRUD
+from app.crud.status_buffer import StatusWriteBuffer
+from app.config import settings
 import json
 
+# Recipients per multi-row INSERT when queueing a campaign
+ENQUEUE_CHUNK_SIZE = 1000
+
+# Campaign statuses before finalize_campaign settles them: 'scheduled' until
+# the first delivery is sent (send_at in the future), then 'pending'
+UNSETTLED_STATUSES = ("scheduled", "pending")
+
+# EmailLog.recipients is a String(2000) summary; full lists live in email_deliveries
+RECIPIENTS_SUMMARY_MAX_LENGTH = 2000
+
+def recipients_summary(to: List[str], cc: Optional[List[str]] = None,
+                       bcc: Optional[List[str]] = None, to_count: Optional[int] = None) -> str:
+    """
+    JSON recipients summary for EmailLog.recipients: counts plus as many
+    'to' addresses as fit the column ('truncated' tells whether all fit).
+    `to_count` is the real number of 'to' recipients when `to` is only a preview.
+    """
+    cc, bcc = cc or [], bcc or []
+    to_count = len(to) if to_count is None else to_count
+    summary = {'to': list(to), 'cc': cc, 'bcc': bcc,
+               'total': to_count + len(cc) + len(bcc), 'truncated': to_count > len(to)}
+    encoded = json.dumps(summary)
+    if len(encoded) <= RECIPIENTS_SUMMARY_MAX_LENGTH:
+        return encoded
+    
+    summary.update(cc=[], bcc=[], truncated=True)
+    preview = []
+    budget = RECIPIENTS_SUMMARY_MAX_LENGTH - len(json.dumps({**summary, 'to': []}))
+    for address in to:
+        budget -= len(json.dumps(address)) + 2
+        if budget < 0:
+            break
+        preview.append(address)
+    summary['to'] = preview
+    return json.dumps(summary)
+
+class SMTPSettings(NamedTuple):
+    """Resolved sender settings with the decrypted app password"""
+    user_id: int
+    secret_id: int
+    email_provider: str
+    email_address: str
+    smtp_host: Optional[str]
+    smtp_port: Optional[int]
+    use_tls: bool
+    max_parallel_sessions: Optional[int]
+    password: str
+
+class ClaimedDelivery(NamedTuple):
+    """
+    A delivery as claimed by a worker. Plain values, so the worker's later
+    commits (quota, status flushes) do not expire and re-load each row.
+    """
+    id: int
+    email_log_id: int
+    recipient: str
+    variables: Optional[str]
+    attempts: int
+    first_attempt_at: Optional[datetime]
+
+# (user_id, provider or None) -> SMTPSettings. Per process: other processes
+# (send workers) see config changes once the TTL expires.
+smtp_settings_cache = TTLCache(
+    maxsize=settings.CREDENTIAL_CACHE_SIZE,
+    ttl=settings.CREDENTIAL_CACHE_TTL
+)
+
 class EmailConfigCRUD:
     
+    @staticmethod
+    def invalidate_cached_settings(user_id: int):
+        """Forget cached sender settings for every provider of a user"""
+        smtp_settings_cache.invalidate_where(lambda key: key[0] == user_id)
+    
     @staticmethod
     def create_config(db: Session, user_id: int, config: EmailConfigCreate):
         """Create or update email configuration"""
@@ -32,8 +112,10 @@ class EmailConfigCRUD:
             existing.smtp_host = config.smtp_host
             existing.smtp_port = config.smtp_port
             existing.use_tls = str(config.use_tls).lower()
+            existing.max_parallel_sessions = config.max_parallel_sessions
             db.commit()
             db.refresh(existing)
+            EmailConfigCRUD.invalidate_cached_settings(user_id)
             return existing
         
         # Create new
@@ -45,11 +127,13 @@ class EmailConfigCRUD:
             iv=iv,
             smtp_host=config.smtp_host,
             smtp_port=config.smtp_port,
-            use_tls=str(config.use_tls).lower()
+            use_tls=str(config.use_tls).lower(),
+            max_parallel_sessions=config.max_parallel_sessions
         )
         db.add(db_config)
         db.commit()
         db.refresh(db_config)
+        EmailConfigCRUD.invalidate_cached_settings(user_id)
         return db_config
     
     @staticmethod
@@ -68,8 +152,43 @@ class EmailConfigCRUD:
             query = query.filter(UserSecret.email_provider == provider)
         deleted_count = query.delete()
         db.commit()
+        EmailConfigCRUD.invalidate_cached_settings(user_id)
         return deleted_count
     
+    @staticmethod
+    def _store_rotated(db: Session, secret_id: int, old_token: str, new_token: str) -> int:
+        """Swap in a re-encrypted token unless the password was changed meanwhile (caller commits)"""
+        return db.query(UserSecret)\
+            .filter(UserSecret.id == secret_id, UserSecret.encrypted_app_password == old_token)\
+            .update({UserSecret.encrypted_app_password: new_token}, synchronize_session=False)
+    
+    @staticmethod
+    def _decrypt_password(db: Session, config: UserSecret) -> str:
+        """
+        Decrypt the stored app password. A token still made with one of
+        PREVIOUS_SECRET_KEYS is re-encrypted under SECRET_KEY on the way,
+        so retired keys drop out of use as senders are read.
+        """
+        password, rotated = decrypt_password_for_rotation(config.encrypted_app_password, config.iv)
+        if rotated is not None:
+            EmailConfigCRUD._store_rotated(db, config.id, config.encrypted_app_password, rotated)
+            db.commit()
+        return password
+    
+    @staticmethod
+    def rotate_passwords(db: Session) -> int:
+        """Re-encrypt every app password still made with a previous key. Returns how many."""
+        rotated = 0
+        rows = db.query(UserSecret.id, UserSecret.encrypted_app_password, UserSecret.iv)\
+            .order_by(UserSecret.id)\
+            .all()
+        for secret_id, token, iv in rows:
+            _, new_token = decrypt_password_for_rotation(token, iv)
+            if new_token is not None:
+                rotated += EmailConfigCRUD._store_rotated(db, secret_id, token, new_token)
+        db.commit()
+        return rotated
+    
     @staticmethod
     def get_decrypted_password(db: Session, user_id: int, provider: str):
         """Get decrypted app password"""
@@ -79,7 +198,36 @@ class EmailConfigCRUD:
         ).first()
         if not config:
             return None
-        return decrypt_password(config.encrypted_app_password, config.iv)
+        return EmailConfigCRUD._decrypt_password(db, config)
+    
+    @staticmethod
+    def get_smtp_settings(db: Session, user_id: int, provider: str = None) -> Optional[SMTPSettings]:
+        """
+        Sender settings plus decrypted password, served from an in-process
+        LRU+TTL cache so hot senders cost no query and no decryption.
+        """
+        cache_key = (user_id, provider)
+        cached = smtp_settings_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        config = EmailConfigCRUD.get_config(db, user_id, provider)
+        if not config:
+            return None
+        
+        resolved = SMTPSettings(
+            user_id=user_id,
+            secret_id=config.id,
+            email_provider=config.email_provider,
+            email_address=config.email_address,
+            smtp_host=config.smtp_host,
+            smtp_port=config.smtp_port,
+            use_tls=str(config.use_tls).lower() != 'false',
+            max_parallel_sessions=config.max_parallel_sessions,
+            password=EmailConfigCRUD._decrypt_password(db, config)
+        )
+        smtp_settings_cache.set(cache_key, resolved)
+        return resolved
 
 class EmailLogCRUD:
     
@@ -101,23 +249,287 @@ class EmailLogCRUD:
         return log
     
     @staticmethod
-    def get_user_logs(db: Session, user_id: int, skip: int = 0, limit: int = 50):
-        """Get email logs for user"""
-        return db.query(EmailLog)\
+    def create_campaign(db: Session, user_id: int, sender_email: str, recipients: str,
+                        to: List[str], subject: str, body: str, is_html: bool,
+                        attachments: Optional[List[Dict[str, Any]]] = None,
+                        cc: Optional[List[str]] = None, bcc: Optional[List[str]] = None,
+                        available_at: Optional[datetime] = None,
+                        variables: Optional[List[Dict[str, str]]] = None,
+                        recipient_list_id: Optional[int] = None, list_variables: bool = False):
+        """
+        Create a pending email log and queue one delivery per 'to' recipient in one transaction.
+        An `available_at` in the future makes it a scheduled campaign.
+        `variables` (aligned with `to`) makes it a templated campaign.
+        With `recipient_list_id` the deliveries are copied from the list's
+        entries instead of `to` (their variables too if `list_variables`).
+        """
+        scheduled = available_at is not None and available_at > datetime.utcnow()
+        log = EmailLog(
+            user_id=user_id,
+            recipients=recipients,
+            subject=subject,
+            status="scheduled" if scheduled else "pending",
+            scheduled_at=available_at if scheduled else None,
+            sender_email=sender_email,
+            body=body,
+            is_html=is_html,
+            is_template=variables is not None or list_variables,
+            cc_recipients=json.dumps(cc or []),
+            bcc_recipients=json.dumps(bcc or []),
+            attachments_count=len(attachments or []),
+            attachments_payload=json.dumps(attachments or [])
+        )
+        db.add(log)
+        db.flush()
+        
+        handles = {att['handle'] for att in (attachments or []) if att.get('handle')}
+        if handles:
+            db.execute(insert(CampaignAttachment), [
+                {"email_log_id": log.id, "sha256": handle} for handle in handles
+            ])
+        
+        if recipient_list_id is not None:
+            EmailDeliveryCRUD.enqueue_from_list(db, log.id, user_id, recipient_list_id,
+                                                available_at, list_variables)
+        else:
+            EmailDeliveryCRUD.enqueue(db, log.id, user_id, to, available_at, variables)
+        db.commit()
+        return log
+    
+    @staticmethod
+    def get_user_logs(db: Session, user_id: int, skip: int = 0, limit: int = 50,
+                      before: Optional[tuple] = None):
+        """
+        Get email logs for user, newest first.
+        `before` is a (created_at, id) keyset position: rows strictly older
+        than it are returned, so deep pages cost the same as the first one.
+        """
+        query = db.query(EmailLog)\
             .filter(EmailLog.user_id == user_id)\
-            .order_by(desc(EmailLog.created_at))\
-            .offset(skip)\
+            .order_by(desc(EmailLog.created_at), desc(EmailLog.id))
+        if before is not None:
+            created_at, log_id = before
+            query = query.filter(or_(
+                EmailLog.created_at < created_at,
+                and_(EmailLog.created_at == created_at, EmailLog.id < log_id)
+            ))
+        else:
+            query = query.offset(skip)
+        return query.limit(limit).all()
+    
+    @staticmethod
+    def get_user_log(db: Session, user_id: int, log_id: int):
+        """Get one email log, only if it belongs to the user"""
+        return db.query(EmailLog)\
+            .filter(EmailLog.id == log_id, EmailLog.user_id == user_id)\
+            .first()
+    
+    @staticmethod
+    def has_pending_campaign_with_attachment(db: Session, sha256: str) -> bool:
+        """Whether a not yet settled campaign still references stored content"""
+        return db.query(CampaignAttachment.id)\
+            .join(EmailLog, EmailLog.id == CampaignAttachment.email_log_id)\
+            .filter(CampaignAttachment.sha256 == sha256,
+                    EmailLog.status.in_(UNSETTLED_STATUSES))\
+            .first() is not None
+    
+    @staticmethod
+    def update_log_status(db: Session, log_id: int, status: str, message_id: str = None) -> bool:
+        """Update email log status with a single UPDATE. Returns whether the log exists."""
+        values = {EmailLog.status: status}
+        if message_id:
+            values[EmailLog.message_id] = message_id
+        updated = db.query(EmailLog)\
+            .filter(EmailLog.id == log_id)\
+            .update(values, synchronize_session=False)
+        db.commit()
+        return updated > 0
+
+class EmailDeliveryCRUD:
+    
+    @staticmethod
+    def enqueue(db: Session, email_log_id: int, user_id: int, recipients: List[str],
+                available_at: Optional[datetime] = None,
+                variables: Optional[List[Dict[str, str]]] = None):
+        """
+        Queue one delivery row per recipient (caller commits).
+        Rows go out as multi-row INSERTs in chunks instead of one ORM
+        object per recipient.
+        """
+        available_at = available_at or datetime.utcnow()
+        for start in range(0, len(recipients), ENQUEUE_CHUNK_SIZE):
+            end = start + ENQUEUE_CHUNK_SIZE
+            chunk_variables = variables[start:end] if variables is not None else None
+            db.execute(insert(EmailDelivery), [
+                {
+                    "email_log_id": email_log_id,
+                    "user_id": user_id,
+                    "recipient": recipient,
+                    "variables": json.dumps(chunk_variables[idx]) if chunk_variables is not None else None,
+                    "status": "queued",
+                    "attempts": 0,
+                    "available_at": available_at,
+                }
+                for idx, recipient in enumerate(recipients[start:end])
+            ])
+    
+    @staticmethod
+    def enqueue_from_list(db: Session, email_log_id: int, user_id: int, list_id: int,
+                          available_at: Optional[datetime] = None,
+                          with_variables: bool = False) -> int:
+        """
+        Queue one delivery per entry of a recipient list, skipping suppressed
+        addresses (caller commits). A single INSERT ... SELECT - the entries
+        never pass through the application.
+        Returns the number of deliveries queued.
+        """
+        available_at = available_at or datetime.utcnow()
+        entries = select(
+            literal(email_log_id), literal(user_id), RecipientListEntry.address,
+            RecipientListEntry.variables if with_variables else null(),
+            literal("queued"), literal(0), literal(available_at, TIMESTAMP)
+        ).where(
+            RecipientListEntry.list_id == list_id,
+            ~RecipientListCRUD.suppressed_entry_filter(user_id)
+        ).order_by(RecipientListEntry.id)
+        result = db.execute(insert(EmailDelivery).from_select(
+            ["email_log_id", "user_id", "recipient", "variables", "status", "attempts", "available_at"],
+            entries
+        ))
+        return result.rowcount
+    
+    @staticmethod
+    def claim_batch(db: Session, worker_id: str, limit: int, lease_seconds: int) -> List[ClaimedDelivery]:
+        """
+        Claim up to `limit` due deliveries for this worker.
+        SKIP LOCKED lets any number of workers claim concurrently without
+        blocking on (or double-claiming) each other's rows. Rows stuck in
+        'sending' past their lease (crashed worker) are claimed again.
+        """
+        now = datetime.utcnow()
+        lease_expired = now - timedelta(seconds=lease_seconds)
+        deliveries = db.query(EmailDelivery)\
+            .filter(or_(
+                and_(EmailDelivery.status == "queued", EmailDelivery.available_at <= now),
+                and_(EmailDelivery.status == "sending", EmailDelivery.locked_at < lease_expired)
+            ))\
+            .order_by(EmailDelivery.id)\
             .limit(limit)\
+            .with_for_update(skip_locked=True)\
             .all()
+        
+        for delivery in deliveries:
+            delivery.status = "sending"
+            delivery.locked_by = worker_id
+            delivery.locked_at = now
+            delivery.attempts = (delivery.attempts or 0) + 1
+            delivery.first_attempt_at = delivery.first_attempt_at or now
+            delivery.last_attempt_at = now
+        claimed = [
+            ClaimedDelivery(delivery.id, delivery.email_log_id, delivery.recipient, delivery.variables,
+                            delivery.attempts, delivery.first_attempt_at)
+            for delivery in deliveries
+        ]
+        db.commit()
+        return claimed
     
     @staticmethod
-    def update_log_status(db: Session, log_id: int, status: str, message_id: str = None):
-        """Update email log status"""
-        log = db.query(EmailLog).filter(EmailLog.id == log_id).first()
-        if log:
-            log.status = status
-            if message_id:
-                log.message_id = message_id
-            db.commit()
-            db.refresh(log)
-        return log
+    def next_due_times(db: Session, limit: int) -> List[datetime]:
+        """The next `limit` distinct future due times of queued deliveries (index range scan)"""
+        rows = db.query(EmailDelivery.available_at)\
+            .filter(EmailDelivery.status == "queued", EmailDelivery.available_at > datetime.utcnow())\
+            .distinct()\
+            .order_by(EmailDelivery.available_at)\
+            .limit(limit)\
+            .all()
+        return [available_at for available_at, in rows]
+    
+    # Outcomes go through the worker's StatusWriteBuffer: one bulk UPDATE per
+    # flush instead of a write per recipient.
+    
+    @staticmethod
+    def mark_sent(writes: StatusWriteBuffer, delivery: ClaimedDelivery, message_id: str):
+        writes.add({
+            "id": delivery.id, "status": "sent", "smtp_code": 250, "message_id": message_id,
+            "error_message": None, "sent_at": datetime.utcnow(), "locked_by": None,
+        })
+    
+    @staticmethod
+    def defer(writes: StatusWriteBuffer, delivery: ClaimedDelivery, available_at: datetime):
+        """Put a claimed delivery back in the queue without counting an attempt"""
+        attempts = max((delivery.attempts or 1) - 1, 0)
+        writes.add({
+            "id": delivery.id, "status": "queued", "available_at": available_at,
+            "attempts": attempts, "first_attempt_at": delivery.first_attempt_at if attempts else None,
+            "locked_by": None, "locked_at": None,
+        })
+    
+    @staticmethod
+    def retry_later(writes: StatusWriteBuffer, delivery: ClaimedDelivery,
+                    available_at: datetime, error: str, smtp_code: Optional[int] = None):
+        """Re-queue a delivery after a transient failure; the attempt stays counted"""
+        writes.add({
+            "id": delivery.id, "status": "queued", "available_at": available_at,
+            "smtp_code": smtp_code, "error_message": error, "locked_by": None, "locked_at": None,
+        })
+
+    @staticmethod
+    def mark_failed(writes: StatusWriteBuffer, delivery: ClaimedDelivery, error: str,
+                    smtp_code: Optional[int] = None):
+        writes.add({
+            "id": delivery.id, "status": "failed", "smtp_code": smtp_code,
+            "error_message": error, "locked_by": None,
+        })
+    
+    @staticmethod
+    def get_campaign_deliveries(db: Session, email_log_id: int, status: Optional[str] = None,
+                                after_id: int = 0, limit: int = 100) -> List[EmailDelivery]:
+        """Deliveries of one campaign in id order, optionally by status (keyset paged)"""
+        query = db.query(EmailDelivery)\
+            .filter(EmailDelivery.email_log_id == email_log_id)
+        if status:
+            query = query.filter(EmailDelivery.status == status)
+        return query\
+            .filter(EmailDelivery.id > after_id)\
+            .order_by(EmailDelivery.id)\
+            .limit(limit)\
+            .all()
+    
+    @staticmethod
+    def status_counts(db: Session, email_log_id: int) -> Dict[str, int]:
+        """Delivery count per status for one campaign"""
+        rows = db.query(EmailDelivery.status, func.count(EmailDelivery.id))\
+            .filter(EmailDelivery.email_log_id == email_log_id)\
+            .group_by(EmailDelivery.status)\
+            .all()
+        return {status: count for status, count in rows}
+    
+    @staticmethod
+    def campaign_progress(db: Session, email_log_id: int) -> Dict[str, Any]:
+        """Campaign status with its delivery counts, as streamed to clients"""
+        log_status = db.query(EmailLog.status).filter(EmailLog.id == email_log_id).scalar()
+        counts = EmailDeliveryCRUD.status_counts(db, email_log_id)
+        return {
+            "email_log_id": email_log_id, "status": log_status,
+            "counts": counts, "total": sum(counts.values()),
+        }
+    
+    @staticmethod
+    def finalize_campaign(db: Session, email_log_id: int) -> Optional[str]:
+        """
+        Set the campaign's final status once none of its deliveries are
+        outstanding. Returns that status, or None while some still are.
+        """
+        counts = EmailDeliveryCRUD.status_counts(db, email_log_id)
+        if counts.get("queued") or counts.get("sending"):
+            return None
+        
+        sent = counts.get("sent", 0)
+        if sent and counts.get("failed"):
+            status, message = "partial", f"Sent to {sent} recipients"
+        elif sent:
+            status, message = "success", f"Sent to {sent} recipients"
+        else:
+            status, message = "failed", "Failed to send to all recipients"
+        EmailLogCRUD.update_log_status(db, email_log_id, status, message)
+        return status
@@ -0,0 +1,100 @@
+"""
+CRUD operations for sender quotas (rate limit state)
+"""
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.rate_limit import (
+    ProviderProfile, QuotaGrant, plan_deferrals, refill, split_grant
+)
+from app.models.sender_quota import SenderQuota
+
+class SenderQuotaCRUD:
+    
+    @staticmethod
+    def _locked_row(db: Session, user_secret_id: int, profile: ProviderProfile) -> SenderQuota:
+        """The sender's quota row, locked for this transaction (created on first use)"""
+        quota = db.query(SenderQuota)\
+            .filter(SenderQuota.user_secret_id == user_secret_id)\
+            .with_for_update()\
+            .first()
+        if quota is not None:
+            return quota
+        
+        try:
+            db.add(SenderQuota(
+                user_secret_id=user_secret_id,
+                quota_day=datetime.utcnow().date(),
+                sent_today=0,
+                tokens=float(profile.burst),
+                refilled_at=time.time(),
+                paused_until=0.0
+            ))
+            db.commit()
+        except IntegrityError:
+            # Another worker created it first
+            db.rollback()
+        return db.query(SenderQuota)\
+            .filter(SenderQuota.user_secret_id == user_secret_id)\
+            .with_for_update()\
+            .one()
+    
+    @staticmethod
+    def reserve(db: Session, user_secret_id: int, profile: ProviderProfile, count: int,
+                recipients_per_message: int = 1) -> QuotaGrant:
+        """
+        Take up to `count` send slots from the sender's token bucket and
+        daily quota. The bucket counts messages, the daily quota counts
+        envelope recipients (`recipients_per_message` each, like providers
+        do). Commits, so the row lock is held only for this call.
+        """
+        quota = SenderQuotaCRUD._locked_row(db, user_secret_id, profile)
+        now = datetime.utcnow()
+        if quota.quota_day != now.date():
+            quota.quota_day = now.date()
+            quota.sent_today = 0
+        
+        daily_left = None
+        if profile.per_day:
+            daily_left = max(profile.per_day - quota.sent_today, 0) // recipients_per_message
+        
+        now_ts = time.time()
+        if quota.paused_until > now_ts:
+            # Throttled by the provider: nothing goes out before the pause ends
+            db.commit()
+            resume_at = now + timedelta(seconds=quota.paused_until - now_ts)
+            return QuotaGrant(
+                granted=0,
+                retry_at=plan_deferrals(count, 0.0, daily_left, profile, resume_at)
+            )
+        
+        tokens = refill(quota.tokens, quota.refilled_at, now_ts, profile)
+        granted, tokens_left = split_grant(count, tokens, daily_left)
+        # Unlimited rate: nothing to store (the column cannot hold infinity)
+        quota.tokens = tokens_left if profile.per_minute else 0.0
+        quota.refilled_at = now_ts
+        quota.sent_today += granted * recipients_per_message
+        db.commit()
+        
+        if daily_left is not None:
+            daily_left -= granted
+        return QuotaGrant(
+            granted=granted,
+            retry_at=plan_deferrals(count - granted, tokens_left, daily_left, profile, now)
+        )
+    
+    @staticmethod
+    def throttle(db: Session, user_secret_id: int, profile: ProviderProfile, seconds: float):
+        """
+        Provider pushed back (421/454): pause this sender for `seconds`.
+        The bucket starts empty when the pause ends, so sending ramps up
+        at the sustained rate instead of bursting.
+        """
+        quota = SenderQuotaCRUD._locked_row(db, user_secret_id, profile)
+        quota.paused_until = time.time() + seconds
+        quota.tokens = 0.0
+        quota.refilled_at = quota.paused_until
+        db.commit()
@@ -0,0 +1,110 @@
+"""
+CRUD operations for imported recipient lists
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import desc, exists, insert, and_
+from typing import Dict, Iterable, List, Optional
+from app.models.recipient_list import RecipientList, RecipientListEntry
+from app.models.suppression import Suppression
+from app.core.recipient_import import ImportBatch
+import json
+
+# Entries per multi-row INSERT while importing
+ENTRY_CHUNK_SIZE = 1000
+
+class RecipientListCRUD:
+
+    @staticmethod
+    def create(db: Session, user_id: int, name: str, columns: List[str]) -> RecipientList:
+        """Start a list (caller commits once its entries are added)"""
+        recipient_list = RecipientList(user_id=user_id, name=name, columns=json.dumps(columns))
+        db.add(recipient_list)
+        db.flush()
+        return recipient_list
+
+    @staticmethod
+    def add_entries(db: Session, list_id: int, entries: List[Dict]):
+        """Insert entries ({address, address_key, variables}) in multi-row chunks"""
+        for start in range(0, len(entries), ENTRY_CHUNK_SIZE):
+            db.execute(insert(RecipientListEntry), [
+                {"list_id": list_id, **entry}
+                for entry in entries[start:start + ENTRY_CHUNK_SIZE]
+            ])
+
+    @staticmethod
+    def import_entries(db: Session, user_id: int, name: str, columns: List[str],
+                       batches: Iterable[ImportBatch]) -> RecipientList:
+        """
+        Store a list from parsed batches (app.core.recipient_import), inserting
+        each batch as it arrives. Everything is committed together; on any
+        error nothing is kept.
+        """
+        try:
+            recipient_list = RecipientListCRUD.create(db, user_id, name, columns)
+            rows = invalid = duplicates = 0
+            for batch in batches:
+                RecipientListCRUD.add_entries(db, recipient_list.id, batch.entries)
+                rows += len(batch.entries)
+                invalid += batch.invalid
+                duplicates += batch.duplicates
+            recipient_list.row_count = rows
+            recipient_list.invalid_count = invalid
+            recipient_list.duplicate_count = duplicates
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        db.refresh(recipient_list)
+        return recipient_list
+
+    @staticmethod
+    def get_user_list(db: Session, user_id: int, list_id: int) -> Optional[RecipientList]:
+        return db.query(RecipientList)\
+            .filter(RecipientList.id == list_id, RecipientList.user_id == user_id)\
+            .first()
+
+    @staticmethod
+    def list_user_lists(db: Session, user_id: int, skip: int = 0, limit: int = 50) -> List[RecipientList]:
+        return db.query(RecipientList)\
+            .filter(RecipientList.user_id == user_id)\
+            .order_by(desc(RecipientList.id))\
+            .offset(skip)\
+            .limit(limit)\
+            .all()
+
+    @staticmethod
+    def preview_addresses(db: Session, list_id: int, limit: int) -> List[str]:
+        rows = db.query(RecipientListEntry.address)\
+            .filter(RecipientListEntry.list_id == list_id)\
+            .order_by(RecipientListEntry.id)\
+            .limit(limit)\
+            .all()
+        return [address for address, in rows]
+
+    @staticmethod
+    def suppressed_entry_filter(user_id: int):
+        """Entries whose address is on the user's suppression list"""
+        return exists().where(and_(
+            Suppression.user_id == user_id,
+            Suppression.address == RecipientListEntry.address_key
+        ))
+
+    @staticmethod
+    def count_suppressed(db: Session, user_id: int, list_id: int) -> int:
+        return db.query(RecipientListEntry.id)\
+            .filter(RecipientListEntry.list_id == list_id,
+                    RecipientListCRUD.suppressed_entry_filter(user_id))\
+            .count()
+
+    @staticmethod
+    def delete(db: Session, user_id: int, list_id: int) -> bool:
+        """Delete a list and its entries (campaigns already queued from it keep their deliveries)"""
+        recipient_list = RecipientListCRUD.get_user_list(db, user_id, list_id)
+        if not recipient_list:
+            return False
+        db.query(RecipientListEntry)\
+            .filter(RecipientListEntry.list_id == list_id)\
+            .delete(synchronize_session=False)
+        db.delete(recipient_list)
+        db.commit()
+        return True
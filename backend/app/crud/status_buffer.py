@@ -0,0 +1,80 @@
+"""
+Write-behind buffer for status updates - many row changes, one executemany per flush
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Type
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StatusWriteBuffer:
+    """
+    Collects column updates for rows of one model (dicts carrying the
+    primary key as "id") and writes them with bulk UPDATEs: SQLAlchemy
+    groups rows that set the same columns into a single executemany.
+
+    Flushed when max_pending rows are waiting or the oldest update has
+    waited max_delay seconds (checked on add), and whenever the owner
+    calls flush(). A later update of the same row is merged into the
+    earlier one. Each flush runs in a short session of its own, so it
+    never commits (or expires objects of) the caller's transaction.
+    """
+
+    def __init__(self, model: Type, session_factory: Callable[[], Session],
+                 max_pending: Optional[int] = None, max_delay: Optional[float] = None):
+        self.model = model
+        self.session_factory = session_factory
+        self.max_pending = max_pending or settings.STATUS_FLUSH_SIZE
+        self.max_delay = settings.STATUS_FLUSH_INTERVAL if max_delay is None else max_delay
+        self._pending: Dict[int, Dict] = {}
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self.flushes = 0
+        self.rows_written = 0
+
+    def add(self, values: Dict):
+        with self._lock:
+            pending = self._pending.get(values["id"])
+            if pending is None:
+                self._pending[values["id"]] = dict(values)
+            else:
+                pending.update(values)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = len(self._pending) >= self.max_pending or \
+                time.monotonic() - self._oldest >= self.max_delay
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write and commit everything pending. Returns the number of rows updated."""
+        with self._lock:
+            rows: List[Dict] = list(self._pending.values())
+            if not rows:
+                return 0
+            db = self.session_factory()
+            try:
+                db.execute(update(self.model), rows)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise  # Updates stay pending for the next flush
+            finally:
+                db.close()
+            self._pending = {}
+            self._oldest = None
+            self.flushes += 1
+            self.rows_written += len(rows)
+        logger.debug("Flushed %d %s status updates", len(rows), self.model.__tablename__)
+        return len(rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
@@ -0,0 +1,86 @@
+"""
+CRUD operations for the per-user suppression list
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
+from typing import FrozenSet, Iterable, List, Optional
+from app.models.suppression import Suppression
+from app.core.cache import TTLCache
+from app.core.recipients import address_key
+from app.config import settings
+
+# user_id -> frozenset of suppressed address keys. Loaded with one query and
+# probed once per recipient, so filtering a large list is set lookups only.
+suppression_cache = TTLCache(
+    maxsize=settings.SUPPRESSION_CACHE_SIZE,
+    ttl=settings.SUPPRESSION_CACHE_TTL
+)
+
+class SuppressionCRUD:
+
+    @staticmethod
+    def get_suppressed_set(db: Session, user_id: int) -> FrozenSet[str]:
+        """Every suppressed address key of a user (cached per process)"""
+        suppressed = suppression_cache.get(user_id)
+        if suppressed is None:
+            rows = db.query(Suppression.address).filter(Suppression.user_id == user_id).all()
+            suppressed = frozenset(address for address, in rows)
+            suppression_cache.set(user_id, suppressed)
+        return suppressed
+
+    @staticmethod
+    def add(db: Session, user_id: int, addresses: Iterable[str], reason: str = "manual",
+            smtp_code: Optional[int] = None) -> int:
+        """Suppress addresses for a user; ones already on the list are left as they are. Returns how many were added."""
+        keys = {address_key(address) for address in addresses}
+        if not keys:
+            return 0
+
+        existing = {
+            address for address, in db.query(Suppression.address).filter(
+                Suppression.user_id == user_id,
+                Suppression.address.in_(keys)
+            ).all()
+        }
+        new_keys = sorted(keys - existing)
+        added = len(new_keys)
+        if new_keys:
+            try:
+                db.add_all([
+                    Suppression(user_id=user_id, address=key, reason=reason, smtp_code=smtp_code)
+                    for key in new_keys
+                ])
+                db.commit()
+            except IntegrityError:
+                # Another worker suppressed some of them first - add the rest one by one
+                db.rollback()
+                added = 0
+                for key in new_keys:
+                    try:
+                        db.add(Suppression(user_id=user_id, address=key, reason=reason, smtp_code=smtp_code))
+                        db.commit()
+                        added += 1
+                    except IntegrityError:
+                        db.rollback()
+        suppression_cache.invalidate(user_id)
+        return added
+
+    @staticmethod
+    def remove(db: Session, user_id: int, address: str) -> bool:
+        deleted = db.query(Suppression).filter(
+            Suppression.user_id == user_id,
+            Suppression.address == address_key(address)
+        ).delete(synchronize_session=False)
+        db.commit()
+        suppression_cache.invalidate(user_id)
+        return bool(deleted)
+
+    @staticmethod
+    def list_user_suppressions(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Suppression]:
+        return db.query(Suppression)\
+            .filter(Suppression.user_id == user_id)\
+            .order_by(desc(Suppression.id))\
+            .offset(skip)\
+            .limit(limit)\
+            .all()
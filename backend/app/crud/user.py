@@ -1,17 +1,61 @@
+from sqlalchemy import event
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, NamedTuple
 
-from app.core.security import get_password_hash, verify_password
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.security import get_password_hash, verify_and_update_password
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.utils.password import validate_password_strength
 
+class CachedUser(NamedTuple):
+    """What authenticated endpoints need to know about the caller"""
+    id: int
+    email: str
+    name: str
+    status: str
+
+# user_id -> CachedUser, per process. Invalidation below only reaches this
+# process: a user blocked or deleted through another API process or a
+# direct SQL change keeps authenticating there until the entry expires,
+# so USER_CACHE_TTL is the upper bound for a block to take effect
+# everywhere (0 disables the cache).
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+def invalidate_cached_user(user_id: int):
+    """Drop the cached copy in this process (other processes wait for the TTL)"""
+    user_cache.invalidate(user_id)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    # Any ORM write to a user (status, email, name...) drops the cached copy
+    invalidate_cached_user(target.id)
+
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
+def get_cached_user(db: Session, user_id: int) -> Optional[CachedUser]:
+    """Caller identity for auth checks, without a users query on cache hits"""
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    return load_cached_user(db, user_id)
+
+def load_cached_user(db: Session, user_id: int) -> Optional[CachedUser]:
+    """Read the caller from the database and cache it (after a user_cache miss)"""
+    user = get_user_by_id(db, user_id)
+    if user is None:
+        return None
+    
+    cached = CachedUser(id=user.id, email=user.email, name=user.name, status=user.status)
+    user_cache.set(user_id, cached)
+    return cached
+
 def create_user(db: Session, user: UserCreate) -> User:
     # Validate password strength
     is_valid, message = validate_password_strength(user.password)
@@ -41,7 +85,13 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     if not user or user.status != "active":
         return None
 
-    if not verify_password(password, user.hashed_password):
+    is_valid, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not is_valid:
         return None
 
+    # Argon2 parameters changed since this hash was made - store an upgraded hash
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+
     return user
@@ -1,7 +1,9 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.core.db_pool import pool_options, instrument_engine
 
 # Railway MySQL database connection
 DATABASE_URL = settings.DATABASE_URL
@@ -10,19 +12,45 @@ DATABASE_URL = settings.DATABASE_URL
 if DATABASE_URL.startswith("mysql://"):
     DATABASE_URL = DATABASE_URL.replace("mysql://", "mysql+mysqlconnector://")
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600
-)
+# Create engine (pool sizing and pre-ping strategy come from settings)
+engine = create_engine(DATABASE_URL, **pool_options("sync"))
+instrument_engine(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async drivers for the async endpoints (same database, non-blocking sockets)
+ASYNC_DRIVERS = {
+    "mysql+mysqlconnector": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_database_url(DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options("async", async_engine=True))
+instrument_engine(async_engine.sync_engine, "async")
+
+# expire_on_commit=False: objects are serialized after the session is gone
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """
+    AsyncSession dependency. The sync CRUD helpers run on it through
+    db.run_sync(...), so queries wait on sockets instead of threadpool threads.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
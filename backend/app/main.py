@@ -1,6 +1,23 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1.endpoints import auth, email_config, emails
+from app.api.v1.endpoints import auth, email_config, emails, attachments, suppressions, recipient_lists
+from app.config import settings
+from app.database import async_engine
+from app.core.log import configure_logging
+from app.core.middleware import BodySizeLimitMiddleware, MetricsMiddleware
+from app.core.metrics import render_metrics
+from app.core.smtp_pool import close_all_pools
+from app.core.db_pool import pool_stats
+from app.core.async_smtp_client import close_all_async_pools
+from app.core.security import HashingBusyError, shutdown_hash_executor
+from app.core.recipient_import import shutdown_import_executor
+from app.crud.email_crud import smtp_settings_cache
+from app.crud.user import user_cache
+from app.crud.suppression_crud import suppression_cache
+from app.worker import start_embedded_workers, stop_embedded_workers
+
+configure_logging()
 
 app = FastAPI(
     title="Premium Email App API",
@@ -9,18 +26,44 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Added before CORS so the 413 it returns still carries CORS headers
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=settings.MAX_REQUEST_BODY_SIZE,
+    # CSV imports are spooled to disk and parsed as a stream: allow a full-size list
+    path_limits={
+        "/api/v1/recipient-lists": settings.MAX_RECIPIENT_LIST_SIZE * settings.RECIPIENT_IMPORT_BYTES_PER_ROW
+    }
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursor paging of /emails/history (browser clients cannot read it otherwise)
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Outermost, so rejected and failed requests are timed too
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(HashingBusyError)
+def hashing_busy_handler(request: Request, exc: HashingBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 # Register routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(email_config.router, prefix="/api/v1/email-config", tags=["Email Configuration"])
 app.include_router(emails.router, prefix="/api/v1/emails", tags=["Emails"])
+app.include_router(attachments.router, prefix="/api/v1/attachments", tags=["Attachments"])
+app.include_router(suppressions.router, prefix="/api/v1/suppressions", tags=["Suppressions"])
+app.include_router(recipient_lists.router, prefix="/api/v1/recipient-lists", tags=["Recipient Lists"])
 
 @app.get("/")
 def root():
@@ -28,4 +71,38 @@ def root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/caches")
+def cache_stats():
+    return {
+        "smtp_settings": smtp_settings_cache.stats(),
+        "users": user_cache.stats(),
+        "suppressions": suppression_cache.stats(),
+    }
+
+@app.get("/health/db-pool")
+def db_pool_stats():
+    return pool_stats()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+@app.on_event("startup")
+def startup():
+    if settings.EMBEDDED_WORKERS > 0:
+        start_embedded_workers(settings.EMBEDDED_WORKERS)
+
+@app.on_event("shutdown")
+def shutdown():
+    stop_embedded_workers()
+    close_all_pools()
+    shutdown_hash_executor()
+    shutdown_import_executor()
+
+@app.on_event("shutdown")
+async def shutdown_async():
+    await close_all_async_pools()
+    await async_engine.dispose()
@@ -0,0 +1,28 @@
+"""
+Attachment Model - Uploaded files a user can attach to any campaign
+"""
+from sqlalchemy import Column, Integer, String, TIMESTAMP, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class Attachment(Base):
+    __tablename__ = "attachments"
+    __table_args__ = (
+        Index("ix_attachments_user_sha256", "user_id", "sha256"),
+        {"extend_existing": True},
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    
+    # Content address in the attachment store (shared by identical uploads)
+    sha256 = Column(String(64), nullable=False, index=True)
+    
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(255), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    
+    def __repr__(self):
+        return f"<Attachment(id={self.id}, user_id={self.user_id}, filename={self.filename})>"
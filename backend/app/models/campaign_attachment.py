@@ -0,0 +1,20 @@
+"""
+CampaignAttachment Model - Stored attachment content referenced by a campaign
+"""
+from sqlalchemy import Column, Integer, String, Index
+from app.database import Base
+
+class CampaignAttachment(Base):
+    __tablename__ = "campaign_attachments"
+    __table_args__ = (
+        # "Does an unsettled campaign still use this blob?" on attachment delete
+        Index("ix_campaign_attachments_sha256", "sha256", "email_log_id"),
+        {"extend_existing": True},
+    )
+    
+    id = Column(Integer, primary_key=True)
+    email_log_id = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False)  # Handle in the attachment store
+    
+    def __repr__(self):
+        return f"<CampaignAttachment(email_log_id={self.email_log_id}, sha256={self.sha256})>"
@@ -0,0 +1,50 @@
+"""
+EmailDelivery Model - One queued send per campaign recipient
+"""
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class EmailDelivery(Base):
+    __tablename__ = "email_deliveries"
+    __table_args__ = (
+        # Workers claim by (status, available_at)
+        Index("ix_email_deliveries_status_available", "status", "available_at"),
+        # Per-campaign listings and status counts
+        Index("ix_email_deliveries_log_status", "email_log_id", "status"),
+        {"extend_existing": True},
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    email_log_id = Column(Integer, nullable=False)  # Campaign (email_logs.id)
+    user_id = Column(Integer, nullable=False)
+    
+    recipient = Column(String(255), nullable=False)
+    
+    # Template variables for this recipient (JSON object, templated campaigns only)
+    variables = Column(Text, nullable=True)
+    
+    # queued -> sending -> sent / failed (transient failures go back to queued)
+    status = Column(String(20), default='queued', nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    
+    # Last SMTP reply for this recipient (250 on success)
+    smtp_code = Column(Integer, nullable=True)
+    
+    # Not claimable before this time (UTC, set by the application)
+    available_at = Column(TIMESTAMP, nullable=False)
+    
+    # Worker lease - a 'sending' row whose lease expired is claimable again
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(TIMESTAMP, nullable=True)
+    
+    message_id = Column(String(500), nullable=True)
+    error_message = Column(Text, nullable=True)
+    
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    first_attempt_at = Column(TIMESTAMP, nullable=True)
+    last_attempt_at = Column(TIMESTAMP, nullable=True)
+    sent_at = Column(TIMESTAMP, nullable=True)
+    
+    def __repr__(self):
+        return f"<EmailDelivery(id={self.id}, email_log_id={self.email_log_id}, status={self.status})>"
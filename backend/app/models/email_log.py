@@ -1,13 +1,18 @@
 """
 EmailLog Model - Store email sending history (UPDATED)
 """
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Boolean, Index
+from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.sql import func
 from app.database import Base
 
 class EmailLog(Base):
     __tablename__ = "email_logs"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # History is listed per user, newest first, paged by (created_at, id)
+        Index("ix_email_logs_user_created_id", "user_id", "created_at", "id"),
+        {"extend_existing": True},
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False)
@@ -38,6 +43,7 @@ class EmailLog(Base):
     # Timestamps
     created_at = Column(TIMESTAMP, server_default=func.now())
     sent_at = Column(TIMESTAMP, nullable=True)
+    scheduled_at = Column(TIMESTAMP, nullable=True)  # send_at of a scheduled campaign (UTC)
     
     # NEW columns that exist in database (add these)
     sender_email = Column(String(255), nullable=True)
@@ -45,5 +51,10 @@ class EmailLog(Base):
     cc_recipients = Column(Text, nullable=True)
     bcc_recipients = Column(Text, nullable=True)
     
+    # Queued campaign payload, read back by the send workers
+    is_html = Column(Boolean, default=False)
+    is_template = Column(Boolean, default=False)  # subject/body rendered per delivery from its variables
+    attachments_payload = Column(Text().with_variant(LONGTEXT(), "mysql"), nullable=True)  # JSON list
+    
     def __repr__(self):
         return f"<EmailLog(id={self.id}, user_id={self.user_id}, status={self.status})>"
\ No newline at end of file
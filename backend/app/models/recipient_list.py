@@ -0,0 +1,44 @@
+"""
+RecipientList Model - Imported recipient lists, referenced by id from /emails/send
+"""
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class RecipientList(Base):
+    __tablename__ = "recipient_lists"
+    __table_args__ = {"extend_existing": True}
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+
+    # Import outcome
+    row_count = Column(Integer, default=0, nullable=False)  # Entries stored
+    invalid_count = Column(Integer, default=0, nullable=False)
+    duplicate_count = Column(Integer, default=0, nullable=False)
+
+    # CSV columns besides the address (JSON list) - template variables of every entry
+    columns = Column(Text, nullable=True)
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    def __repr__(self):
+        return f"<RecipientList(id={self.id}, user_id={self.user_id}, rows={self.row_count})>"
+
+class RecipientListEntry(Base):
+    __tablename__ = "recipient_list_entries"
+    __table_args__ = (
+        # Entries are read and copied per list in id order
+        Index("ix_recipient_list_entries_list_id", "list_id", "id"),
+        {"extend_existing": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    list_id = Column(Integer, nullable=False)
+
+    address = Column(String(255), nullable=False)  # Normalized, as sent
+    address_key = Column(String(255), nullable=False)  # Case-folded, for suppression checks
+
+    # Template variables from the other CSV columns (JSON object)
+    variables = Column(Text, nullable=True)
@@ -0,0 +1,26 @@
+"""
+SenderQuota Model - Rate limit state per sender account, shared by all workers
+"""
+from sqlalchemy import Column, Integer, Float, Date
+from app.database import Base
+
+class SenderQuota(Base):
+    __tablename__ = "sender_quotas"
+    __table_args__ = {"extend_existing": True}
+    
+    # One row per UserSecret
+    user_secret_id = Column(Integer, primary_key=True, autoincrement=False)
+    
+    # Envelope recipients handed to SMTP on quota_day (UTC)
+    quota_day = Column(Date, nullable=False)
+    sent_today = Column(Integer, default=0, nullable=False)
+    
+    # Token bucket: level and when it was last refilled (epoch seconds)
+    tokens = Column(Float(precision=53), default=0, nullable=False)
+    refilled_at = Column(Float(precision=53), default=0, nullable=False)
+    
+    # Nothing is sent before this time (epoch seconds) - set when the provider throttles
+    paused_until = Column(Float(precision=53), default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<SenderQuota(user_secret_id={self.user_secret_id}, day={self.quota_day}, sent={self.sent_today})>"
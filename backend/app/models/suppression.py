@@ -0,0 +1,28 @@
+"""
+Suppression Model - Addresses a user's campaigns must not be sent to
+"""
+from sqlalchemy import Column, Integer, String, TIMESTAMP, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class Suppression(Base):
+    __tablename__ = "suppressions"
+    __table_args__ = (
+        UniqueConstraint("user_id", "address", name="uq_suppressions_user_address"),
+        {"extend_existing": True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+
+    # Case-folded address (see app.core.recipients.address_key)
+    address = Column(String(255), nullable=False)
+
+    # 'bounce' (added by the send worker) or 'manual'
+    reason = Column(String(20), nullable=False, default='manual')
+    smtp_code = Column(Integer, nullable=True)
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    def __repr__(self):
+        return f"<Suppression(user_id={self.user_id}, address={self.address}, reason={self.reason})>"
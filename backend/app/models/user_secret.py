@@ -32,6 +32,9 @@ class UserSecret(Base):
     smtp_port = Column(Integer, nullable=True)
     use_tls = Column(String(10), default='true')  # 'true' or 'false'
     
+    # Parallel SMTP sessions used when sending a campaign (NULL = server default)
+    max_parallel_sessions = Column(Integer, nullable=True)
+    
     # Timestamps
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
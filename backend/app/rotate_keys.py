@@ -0,0 +1,23 @@
+"""
+Re-encrypt stored app passwords under the current SECRET_KEY
+
+Senders are rotated as they are read; run this once after changing
+SECRET_KEY to rotate the rest, then drop the old key from
+PREVIOUS_SECRET_KEYS:
+    python -m app.rotate_keys
+"""
+from app.crud.email_crud import EmailConfigCRUD
+from app.database import SessionLocal
+
+
+def main():
+    db = SessionLocal()
+    try:
+        rotated = EmailConfigCRUD.rotate_passwords(db)
+    finally:
+        db.close()
+    print(f"Re-encrypted {rotated} app password(s) under the current SECRET_KEY")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Attachment Schemas
+"""
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class AttachmentResponse(BaseModel):
+    id: int
+    filename: str
+    content_type: str
+    size_bytes: int
+    sha256: str
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
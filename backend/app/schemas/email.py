@@ -2,13 +2,13 @@
 Email Sending Schemas
 """
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class EmailRecipient(BaseModel):
-    to: List[EmailStr] = Field(..., description="Primary recipients")
-    cc: Optional[List[EmailStr]] = None
-    bcc: Optional[List[EmailStr]] = None
+    to: List[EmailStr] = Field(default_factory=list, description="Primary recipients (or send to a recipient_list_id)")
+    cc: Optional[List[EmailStr]] = Field(None, description="Only with a single 'to' recipient")
+    bcc: Optional[List[EmailStr]] = Field(None, description="Only with a single 'to' recipient")
 
 class EmailAttachment(BaseModel):
     filename: str
@@ -16,11 +16,21 @@ class EmailAttachment(BaseModel):
     base64_content: str = Field(..., description="Base64 encoded file content")
 
 class EmailSendRequest(BaseModel):
-    recipients: EmailRecipient
+    recipients: EmailRecipient = Field(default_factory=EmailRecipient)
+    recipient_list_id: Optional[int] = Field(None, description="ID from POST /api/v1/recipient-lists, instead of recipients.to")
     subject: str = Field(..., min_length=1, max_length=500)
     body: str = Field(..., description="Email body (HTML supported)")
     is_html: bool = False
     attachments: Optional[List[EmailAttachment]] = None
+    attachment_ids: Optional[List[int]] = Field(None, description="IDs from POST /api/v1/attachments")
+    recipient_data: Optional[Dict[str, Dict[str, str]]] = Field(
+        None,
+        description="Variables per 'to' address; when given, subject and body are rendered as {{variable}} templates"
+    )
+    send_at: Optional[datetime] = Field(
+        None,
+        description="Schedule the campaign: nothing is sent before this time (UTC unless it carries an offset)"
+    )
 
 class EmailLogResponse(BaseModel):
     id: int
@@ -30,6 +40,24 @@ class EmailLogResponse(BaseModel):
     status: str
     message_id: Optional[str]
     created_at: datetime
+    scheduled_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class EmailDeliveryResponse(BaseModel):
+    id: int
+    email_log_id: int
+    recipient: str
+    status: str
+    attempts: int
+    smtp_code: Optional[int] = None
+    message_id: Optional[str] = None
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    first_attempt_at: Optional[datetime] = None
+    last_attempt_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
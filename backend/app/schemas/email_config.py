@@ -18,6 +18,7 @@ class EmailConfigBase(BaseModel):
     smtp_host: Optional[str] = None
     smtp_port: Optional[int] = None
     use_tls: bool = True
+    max_parallel_sessions: Optional[int] = Field(None, ge=1, le=20, description="Parallel SMTP sessions for bulk sends")
 
 class EmailConfigCreate(EmailConfigBase):
     pass
@@ -27,6 +28,7 @@ class EmailConfigUpdate(BaseModel):
     smtp_host: Optional[str] = None
     smtp_port: Optional[int] = None
     use_tls: Optional[bool] = None
+    max_parallel_sessions: Optional[int] = Field(None, ge=1, le=20)
 
 class EmailConfigResponse(BaseModel):
     id: int
@@ -36,6 +38,7 @@ class EmailConfigResponse(BaseModel):
     smtp_host: Optional[str]
     smtp_port: Optional[int]
     use_tls: bool
+    max_parallel_sessions: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     
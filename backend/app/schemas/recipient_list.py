@@ -0,0 +1,25 @@
+"""
+Recipient List Schemas
+"""
+from pydantic import BaseModel, field_validator
+from typing import List, Optional
+from datetime import datetime
+import json
+
+class RecipientListResponse(BaseModel):
+    id: int
+    name: str
+    row_count: int
+    invalid_count: int
+    duplicate_count: int
+    columns: List[str] = []
+    created_at: Optional[datetime] = None
+    
+    @field_validator("columns", mode="before")
+    @classmethod
+    def _decode_columns(cls, value):
+        # Stored as a JSON list
+        return json.loads(value) if isinstance(value, str) else (value or [])
+    
+    class Config:
+        from_attributes = True
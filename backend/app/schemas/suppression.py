@@ -0,0 +1,19 @@
+"""
+Suppression List Schemas
+"""
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
+from datetime import datetime
+
+class SuppressionCreate(BaseModel):
+    addresses: List[EmailStr] = Field(..., min_length=1, max_length=1000)
+
+class SuppressionResponse(BaseModel):
+    id: int
+    address: str
+    reason: str
+    smtp_code: Optional[int] = None
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
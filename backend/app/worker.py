@@ -0,0 +1,333 @@
+"""
+Send queue worker - claims queued deliveries from the database and sends them
+
+Run as many of these as needed next to the API (each claims its own rows):
+    python -m app.worker
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import smtplib
+import socket
+import threading
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.crud.email_crud import ClaimedDelivery, EmailConfigCRUD, EmailDeliveryCRUD, EmailLogCRUD
+from app.crud.quota_crud import SenderQuotaCRUD
+from app.crud.status_buffer import StatusWriteBuffer
+from app.crud.suppression_crud import SuppressionCRUD
+from app.core.smtp_client import SMTPClient, PreparedMessage
+from app.core.delivery import send_concurrently
+from app.core.log import configure_logging, sampled
+from app.core.metrics import SMTP_RECIPIENTS
+from app.core.progress import progress_hub
+from app.core.rate_limit import THROTTLE_CODES, provider_profile
+from app.core.retry import (
+    TRANSIENT, classify_error, is_hard_bounce, next_attempt_at, throttled_attempt_at
+)
+from app.core.scheduler import due_times
+from app.core.smtp_pool import smtp_reply_code
+from app.models.email_log import EmailLog
+from app.models.email_delivery import EmailDelivery
+
+logger = logging.getLogger(__name__)
+
+# Prepared messages kept per worker so later batches of a campaign skip re-encoding
+PREPARED_CACHE_SIZE = 8
+
+
+class SendWorker:
+    """Claims batches of due deliveries and sends them, one campaign at a time"""
+
+    def __init__(self, worker_id: Optional[str] = None, batch_size: Optional[int] = None,
+                 poll_interval: Optional[float] = None,
+                 stop_event: Optional[threading.Event] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.batch_size = batch_size or settings.WORKER_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.WORKER_POLL_INTERVAL
+        self.stop_event = stop_event or threading.Event()
+        self._prepared: "OrderedDict[int, PreparedMessage]" = OrderedDict()
+        # Delivery outcomes, written in bulk (see flush_status_writes)
+        self.status_writes = StatusWriteBuffer(EmailDelivery, SessionLocal)
+
+    def run(self):
+        """Work until stop_event is set, sleeping only when nothing is due"""
+        logger.info("Send worker %s started", self.worker_id)
+        while not self.stop_event.is_set():
+            generation = due_times.generation
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception("Send worker %s: batch failed", self.worker_id)
+                claimed = 0
+            if not claimed and not self.stop_event.is_set():
+                self.wait_for_due(generation)
+        logger.info("Send worker %s stopped", self.worker_id)
+
+    def wait_for_due(self, generation: int):
+        """
+        Sleep until the next queued delivery is due, something is queued in
+        this process, or poll_interval passes - no polling in between
+        """
+        if due_times.next_due() is None:
+            db = SessionLocal()
+            try:
+                due_times.refill(EmailDeliveryCRUD.next_due_times(db, settings.SCHEDULER_WINDOW))
+            except Exception:
+                logger.exception("Send worker %s: reading due times failed", self.worker_id)
+            finally:
+                db.close()
+        due_times.wait(generation, self.poll_interval)
+
+    def run_once(self) -> int:
+        """Claim and process one batch. Returns the number of deliveries claimed."""
+        db = SessionLocal()
+        try:
+            deliveries = EmailDeliveryCRUD.claim_batch(
+                db, self.worker_id, self.batch_size, settings.WORKER_LEASE_SECONDS
+            )
+            by_campaign = defaultdict(list)
+            for delivery in deliveries:
+                by_campaign[delivery.email_log_id].append(delivery)
+
+            for email_log_id, campaign_deliveries in by_campaign.items():
+                self.process_campaign(db, email_log_id, campaign_deliveries)
+            return len(deliveries)
+        finally:
+            # Also on errors and on shutdown: nothing already sent is left 'sending'
+            self.flush_status_writes()
+            db.close()
+
+    def flush_status_writes(self):
+        try:
+            self.status_writes.flush()
+        except Exception:
+            # Kept in the buffer; the next flush tries again
+            logger.exception("Send worker %s: writing %d delivery statuses failed",
+                             self.worker_id, len(self.status_writes))
+
+    def _get_prepared(self, smtp_client: SMTPClient, log: EmailLog) -> PreparedMessage:
+        prepared = self._prepared.get(log.id)
+        if prepared is not None:
+            self._prepared.move_to_end(log.id)
+            return prepared
+
+        prepared = smtp_client.prepare_message(
+            subject=log.subject,
+            body=log.body or "",
+            is_html=bool(log.is_html),
+            attachments=json.loads(log.attachments_payload or "[]"),
+            templated=bool(log.is_template)
+        )
+        self._prepared[log.id] = prepared
+        if len(self._prepared) > PREPARED_CACHE_SIZE:
+            self._prepared.popitem(last=False)
+        return prepared
+
+    @staticmethod
+    def _publish(email_log_id: int, delivery: ClaimedDelivery, status: str, **fields):
+        """Per-recipient progress event for streams watching the campaign"""
+        if progress_hub.has_subscribers(email_log_id):
+            progress_hub.publish(email_log_id, {
+                "type": "delivery", "delivery_id": delivery.id, "recipient": delivery.recipient,
+                "status": status, **fields
+            })
+
+    def process_campaign(self, db: Session, email_log_id: int, deliveries: List[ClaimedDelivery]):
+        """Send the claimed deliveries of one campaign and settle its status"""
+        log = db.query(EmailLog).filter(EmailLog.id == email_log_id).first()
+        try:
+            if log is None:
+                raise ValueError("Email log not found")
+
+            config = EmailConfigCRUD.get_smtp_settings(db, log.user_id)
+            if not config:
+                raise ValueError("Email configuration not found")
+
+            smtp_client = SMTPClient.from_config(config)
+            prepared = self._get_prepared(smtp_client, log)
+            if log.status == "scheduled":
+                # send_at reached
+                EmailLogCRUD.update_log_status(db, email_log_id, "pending")
+        except Exception as e:
+            logger.error("Campaign cannot be sent: %s", e,
+                         extra={"campaign_id": email_log_id, "worker_id": self.worker_id})
+            SMTP_RECIPIENTS.labels("unknown", "failed").inc(len(deliveries))
+            for delivery in deliveries:
+                EmailDeliveryCRUD.mark_failed(self.status_writes, delivery, str(e))
+                self._publish(email_log_id, delivery, "failed")
+            self.status_writes.flush()
+            self._finished(db, email_log_id)
+            return
+
+        # Pace to the provider's limits: what has no slot yet goes back in the queue
+        profile = provider_profile(config.email_provider)
+        cc_email = json.loads(log.cc_recipients or "[]")
+        bcc_email = json.loads(log.bcc_recipients or "[]")
+        with SessionLocal() as quota_db:
+            # Own session: the quota row lock and its commit stay out of the batch's transaction
+            grant = SenderQuotaCRUD.reserve(quota_db, config.secret_id, profile, len(deliveries),
+                                            recipients_per_message=1 + len(cc_email) + len(bcc_email))
+        if grant.granted < len(deliveries):
+            for delivery, retry_at in zip(deliveries[grant.granted:], grant.retry_at):
+                EmailDeliveryCRUD.defer(self.status_writes, delivery, retry_at)
+                self._publish(email_log_id, delivery, "deferred",
+                              retry_at=retry_at.isoformat())
+            due_times.add(grant.retry_at[0])
+            logger.info("Deferred %d deliveries over the sender's rate limit",
+                        len(deliveries) - grant.granted,
+                        extra={"campaign_id": email_log_id, "next_at": grant.retry_at[0].isoformat()})
+            deliveries = deliveries[:grant.granted]
+            if not deliveries:
+                return
+
+        outcomes = send_concurrently(
+            smtp_client, prepared,
+            jobs=[
+                (delivery, delivery.recipient, json.loads(delivery.variables) if delivery.variables else None)
+                for delivery in deliveries
+            ],
+            max_parallel=smtp_client.max_sessions,
+            cc_email=cc_email,
+            bcc_email=bcc_email
+        )
+        sent_counter = SMTP_RECIPIENTS.labels(config.email_provider, "sent")
+        failed_counter = SMTP_RECIPIENTS.labels(config.email_provider, "failed")
+        retried_counter = SMTP_RECIPIENTS.labels(config.email_provider, "retried")
+        throttled = False
+        bounced = defaultdict(list)  # smtp_code -> recipients whose mailbox does not exist
+        for outcome in outcomes:
+            if outcome.error is None:
+                EmailDeliveryCRUD.mark_sent(self.status_writes, outcome.key, outcome.message_id)
+                self._publish(email_log_id, outcome.key, "sent")
+                sent_counter.inc()
+                # One line per recipient would drown the log on large campaigns
+                if sampled():
+                    logger.info("Sent", extra={
+                        "campaign_id": email_log_id, "delivery_id": outcome.key.id,
+                        "recipient": outcome.recipient, "message_id": outcome.message_id,
+                    })
+            else:
+                if isinstance(outcome.error, smtplib.SMTPAuthenticationError):
+                    # Password may have changed in another process - re-read it next batch
+                    EmailConfigCRUD.invalidate_cached_settings(log.user_id)
+                smtp_code = smtp_reply_code(outcome.error)
+                retry_at = None
+                if smtp_code in THROTTLE_CODES:
+                    # Provider asked us to slow down: pause the sender; the attempt still counts
+                    throttled = True
+                    retry_at = throttled_attempt_at(outcome.key.attempts)
+                elif classify_error(outcome.error, smtp_code) == TRANSIENT:
+                    retry_at = next_attempt_at(outcome.key.attempts)
+                if retry_at is not None:
+                    logger.info("Send failed, retrying: %s", outcome.error, extra={
+                        "campaign_id": email_log_id, "delivery_id": outcome.key.id,
+                        "recipient": outcome.recipient, "smtp_code": smtp_code,
+                        "attempt": outcome.key.attempts, "retry_at": retry_at.isoformat(),
+                    })
+                    EmailDeliveryCRUD.retry_later(self.status_writes, outcome.key, retry_at, str(outcome.error), smtp_code)
+                    self._publish(email_log_id, outcome.key, "retrying",
+                                  smtp_code=smtp_code, retry_at=retry_at.isoformat())
+                    due_times.add(retry_at)
+                    retried_counter.inc()
+                else:
+                    logger.warning("Send failed: %s", outcome.error, extra={
+                        "campaign_id": email_log_id, "delivery_id": outcome.key.id,
+                        "recipient": outcome.recipient, "smtp_code": smtp_code,
+                        "attempt": outcome.key.attempts,
+                    })
+                    EmailDeliveryCRUD.mark_failed(self.status_writes, outcome.key, str(outcome.error), smtp_code)
+                    self._publish(email_log_id, outcome.key, "failed", smtp_code=smtp_code)
+                    failed_counter.inc()
+                    if is_hard_bounce(outcome.error, smtp_code):
+                        bounced[smtp_code].append(outcome.recipient)
+        # Outcomes are buffered and written in bulk (by size or age, and here at
+        # the latest), so a crash can re-send at most the unflushed ones once
+        # their lease expires
+        self.status_writes.flush()
+
+        for smtp_code, recipients in bounced.items():
+            # Later campaigns skip these at queue time
+            added = SuppressionCRUD.add(db, log.user_id, recipients, reason="bounce", smtp_code=smtp_code)
+            if added:
+                logger.info("Suppressed %d hard-bounced address(es)", added,
+                            extra={"campaign_id": email_log_id, "smtp_code": smtp_code})
+
+        if throttled:
+            logger.warning("Sender throttled by provider, pausing %ss", settings.SEND_THROTTLE_BACKOFF,
+                           extra={"campaign_id": email_log_id, "user_secret_id": config.secret_id})
+            with SessionLocal() as quota_db:
+                SenderQuotaCRUD.throttle(quota_db, config.secret_id, profile, settings.SEND_THROTTLE_BACKOFF)
+
+        self._finished(db, email_log_id)
+
+    def _finished(self, db: Session, email_log_id: int):
+        """Settle the campaign if nothing is outstanding any more"""
+        # Outcomes were flushed in the buffer's own session: end this
+        # transaction so the counts are read from a snapshot that has them
+        db.commit()
+        finished = EmailDeliveryCRUD.finalize_campaign(db, email_log_id)
+        if finished is not None:
+            self._prepared.pop(email_log_id, None)
+            progress_hub.publish(email_log_id, {"type": "finished", "status": finished})
+            logger.info("Campaign finished: %s", finished,
+                        extra={"campaign_id": email_log_id, "worker_id": self.worker_id})
+
+
+_embedded_stop = threading.Event()
+_embedded_threads: List[threading.Thread] = []
+
+
+def start_embedded_workers(count: int):
+    """Run send workers as daemon threads inside the API process"""
+    _embedded_stop.clear()
+    for idx in range(count):
+        worker = SendWorker(stop_event=_embedded_stop)
+        thread = threading.Thread(target=worker.run, name=f"send-worker-{idx}", daemon=True)
+        thread.start()
+        _embedded_threads.append(thread)
+
+
+def stop_embedded_workers(timeout: float = 10.0):
+    """Ask embedded workers to finish their current batch and wait for them"""
+    _embedded_stop.set()
+    due_times.wake()
+    for thread in _embedded_threads:
+        thread.join(timeout)
+    _embedded_threads.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send queued emails")
+    parser.add_argument("--batch-size", type=int, default=settings.WORKER_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=settings.WORKER_POLL_INTERVAL)
+    parser.add_argument("--once", action="store_true", help="Process a single batch and exit")
+    args = parser.parse_args()
+
+    configure_logging()
+
+    worker = SendWorker(batch_size=args.batch_size, poll_interval=args.poll_interval)
+    if args.once:
+        worker.run_once()
+        return
+
+    def _stop(signum, frame):
+        logger.info("Send worker %s: received signal %s, finishing batch", worker.worker_id, signum)
+        worker.stop_event.set()
+        due_times.wake()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# backend/benchmarks/bench_encryption.py
+"""
+Micro-benchmark: per-call decrypt latency with and without the cached key ring
+
+Run from the backend folder:
+    python -m benchmarks.bench_encryption
+"""
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from cryptography.fernet import Fernet
+
+from app.core.encryption import _derive_key, encrypt_password, decrypt_password
+
+
+def decrypt_uncached(token: str) -> str:
+    """What every decrypt used to cost: a full PBKDF2 derivation first"""
+    key = _derive_key.__wrapped__(os.environ["SECRET_KEY"])
+    return Fernet(key).decrypt(token.encode()).decode()
+
+
+def bench(label, fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    per_call = (time.perf_counter() - start) / rounds
+    print(f"{label:<10} {per_call * 1000:10.3f} ms/call  ({rounds} calls)")
+    return per_call
+
+
+if __name__ == "__main__":
+    token, _ = encrypt_password("app-specific-password")
+
+    before = bench("uncached", lambda: decrypt_uncached(token), 20)
+    after = bench("cached", lambda: decrypt_password(token, ""), 20000)
+    print(f"speedup    {before / after:10.0f}x")
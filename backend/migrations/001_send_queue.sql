@@ -0,0 +1,23 @@
+-- Durable send queue: one row per campaign recipient, claimed by app.worker
+
+ALTER TABLE email_logs
+    ADD COLUMN is_html BOOLEAN DEFAULT FALSE,
+    ADD COLUMN attachments_payload LONGTEXT NULL;
+
+CREATE TABLE email_deliveries (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    email_log_id INT NOT NULL,
+    user_id INT NOT NULL,
+    recipient VARCHAR(255) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts INT NOT NULL DEFAULT 0,
+    available_at TIMESTAMP NOT NULL,
+    locked_by VARCHAR(100) NULL,
+    locked_at TIMESTAMP NULL,
+    message_id VARCHAR(500) NULL,
+    error_message TEXT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP NULL,
+    INDEX ix_email_deliveries_email_log_id (email_log_id),
+    INDEX ix_email_deliveries_status_available (status, available_at)
+);
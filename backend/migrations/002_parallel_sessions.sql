@@ -0,0 +1,4 @@
+-- Per-account number of parallel SMTP sessions for bulk sends (NULL = SMTP_POOL_MAX_SESSIONS)
+
+ALTER TABLE user_secrets
+    ADD COLUMN max_parallel_sessions INT NULL;
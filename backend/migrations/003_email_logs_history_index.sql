@@ -0,0 +1,3 @@
+-- Keyset pagination for /emails/history (user_id filter, newest first)
+
+CREATE INDEX ix_email_logs_user_created_id ON email_logs (user_id, created_at, id);
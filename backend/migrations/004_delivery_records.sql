@@ -0,0 +1,8 @@
+-- Per-recipient delivery records: reply code, attempt timestamps, per-campaign index
+
+ALTER TABLE email_deliveries
+    ADD COLUMN smtp_code INT NULL,
+    ADD COLUMN first_attempt_at TIMESTAMP NULL,
+    ADD COLUMN last_attempt_at TIMESTAMP NULL,
+    DROP INDEX ix_email_deliveries_email_log_id,
+    ADD INDEX ix_email_deliveries_log_status (email_log_id, status);
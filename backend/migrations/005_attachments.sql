@@ -0,0 +1,13 @@
+-- Uploaded attachments, stored once per content hash and referenced by id from /emails/send
+
+CREATE TABLE IF NOT EXISTS attachments (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    sha256 CHAR(64) NOT NULL,
+    filename VARCHAR(255) NOT NULL,
+    content_type VARCHAR(255) NOT NULL,
+    size_bytes INT NOT NULL,
+    created_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_attachments_sha256 (sha256),
+    INDEX ix_attachments_user_sha256 (user_id, sha256)
+);
@@ -0,0 +1,9 @@
+-- Rate limit state per sender account (token bucket + daily counter), shared by all workers
+
+CREATE TABLE IF NOT EXISTS sender_quotas (
+    user_secret_id INT NOT NULL PRIMARY KEY,
+    quota_day DATE NOT NULL,
+    sent_today INT NOT NULL DEFAULT 0,
+    tokens DOUBLE NOT NULL DEFAULT 0,
+    refilled_at DOUBLE NOT NULL DEFAULT 0
+);
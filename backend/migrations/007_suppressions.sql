@@ -0,0 +1,12 @@
+-- Per-user suppression list: addresses that hard-bounced or were suppressed by hand
+-- are dropped from every later campaign at queue time
+
+CREATE TABLE IF NOT EXISTS suppressions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    address VARCHAR(255) NOT NULL,
+    reason VARCHAR(20) NOT NULL DEFAULT 'manual',
+    smtp_code INT NULL,
+    created_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_suppressions_user_address (user_id, address)
+);
@@ -0,0 +1,5 @@
+-- Mail merge: templated campaigns render subject/body per delivery from its variables
+
+ALTER TABLE email_logs ADD COLUMN is_template BOOLEAN NOT NULL DEFAULT FALSE;
+
+ALTER TABLE email_deliveries ADD COLUMN variables TEXT NULL;
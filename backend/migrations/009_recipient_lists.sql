@@ -0,0 +1,22 @@
+-- Imported recipient lists (CSV), sent to with recipient_list_id on /emails/send
+
+CREATE TABLE IF NOT EXISTS recipient_lists (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    row_count INT NOT NULL DEFAULT 0,
+    invalid_count INT NOT NULL DEFAULT 0,
+    duplicate_count INT NOT NULL DEFAULT 0,
+    columns TEXT NULL,
+    created_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_recipient_lists_user_id (user_id)
+);
+
+CREATE TABLE IF NOT EXISTS recipient_list_entries (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    list_id INT NOT NULL,
+    address VARCHAR(255) NOT NULL,
+    address_key VARCHAR(255) NOT NULL,
+    variables TEXT NULL,
+    INDEX ix_recipient_list_entries_list_id (list_id, id)
+);
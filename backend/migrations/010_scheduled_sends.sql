@@ -0,0 +1,4 @@
+-- Scheduled sends: send_at on /emails/send, status 'scheduled' until the first delivery goes out.
+-- Deliveries wait in the queue with available_at = send_at (ix_email_deliveries_status_available).
+
+ALTER TABLE email_logs ADD COLUMN scheduled_at TIMESTAMP NULL;
@@ -0,0 +1,16 @@
+-- Stored attachments referenced per campaign, so deleting an attachment checks an index
+-- instead of scanning email_logs.attachments_payload
+
+CREATE TABLE IF NOT EXISTS campaign_attachments (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    email_log_id INT NOT NULL,
+    sha256 CHAR(64) NOT NULL,
+    INDEX ix_campaign_attachments_sha256 (sha256, email_log_id)
+);
+
+-- Campaigns queued before this migration (MySQL 8 JSON_TABLE)
+INSERT INTO campaign_attachments (email_log_id, sha256)
+SELECT l.id, j.handle
+FROM email_logs l,
+     JSON_TABLE(l.attachments_payload, '$[*]' COLUMNS (handle CHAR(64) PATH '$.handle')) j
+WHERE l.status IN ('scheduled', 'pending') AND j.handle IS NOT NULL;
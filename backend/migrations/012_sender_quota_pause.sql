@@ -0,0 +1,4 @@
+-- Provider throttling (421/454) pauses a sender until paused_until (epoch seconds), also when it has no rate limit.
+-- sent_today now counts envelope recipients (to + cc + bcc), which is what providers' daily limits count.
+
+ALTER TABLE sender_quotas ADD COLUMN paused_until DOUBLE NOT NULL DEFAULT 0;
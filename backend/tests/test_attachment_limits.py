@@ -0,0 +1,9 @@
+import base64
+
+from app.core.attachment_limits import base64_decoded_size
+
+
+def test_base64_decoded_size():
+    for size in range(0, 10):
+        data = base64.b64encode(b"x" * size).decode()
+        assert base64_decoded_size(data) == size
@@ -0,0 +1,33 @@
+import base64
+import io
+import os
+
+import pytest
+
+from app.core.attachment_store import AttachmentStore, attachment_store
+from app.core.smtp_client import AttachmentUnavailableError, SMTPClient
+
+
+def test_same_content_is_stored_once(tmp_path):
+    store = AttachmentStore(str(tmp_path))
+    first, size = store.save_stream(io.BytesIO(b"hello"))
+    second, _ = store.save_stream(io.BytesIO(b"hello"))
+    assert first == second and size == 5
+    assert store.read(first) == b"hello"
+
+
+def test_read_encoded_is_mime_base64(tmp_path):
+    store = AttachmentStore(str(tmp_path), chunk_size=100)
+    data = os.urandom(1000)
+    handle, _ = store.save_stream(io.BytesIO(data))
+    encoded = store.read_encoded(handle)
+    lines = encoded.split(b"\r\n")
+    assert lines[-1] == b"" and all(len(line) <= 76 for line in lines)
+    assert base64.b64decode(encoded) == data
+
+
+def test_missing_stored_attachment_raises():
+    handle, _ = attachment_store.save_stream(io.BytesIO(b"gone"))
+    attachment_store.delete(handle)
+    with pytest.raises(AttachmentUnavailableError):
+        SMTPClient.build_attachment_part({"filename": "a.txt", "content_type": "text/plain", "handle": handle})
@@ -0,0 +1,58 @@
+import pytest
+
+from app.config import settings
+from app.core.encryption import decrypt_password, decrypt_password_for_rotation, encrypt_password
+from app.crud.email_crud import EmailConfigCRUD
+from app.models.user_secret import UserSecret
+
+MODELS = [UserSecret]
+
+
+@pytest.fixture
+def old_token(monkeypatch):
+    """A password encrypted under 'old-key', after SECRET_KEY moved on to 'new-key'"""
+    monkeypatch.setattr(settings, "SECRET_KEY", "old-key")
+    monkeypatch.setattr(settings, "PREVIOUS_SECRET_KEYS", None)
+    token, iv = encrypt_password("app-password")
+    monkeypatch.setattr(settings, "SECRET_KEY", "new-key")
+    monkeypatch.setattr(settings, "PREVIOUS_SECRET_KEYS", "old-key")
+    return token, iv
+
+
+def test_current_key_tokens_are_not_rotated(monkeypatch):
+    monkeypatch.setattr(settings, "PREVIOUS_SECRET_KEYS", None)
+    token, iv = encrypt_password("app-password")
+    assert decrypt_password_for_rotation(token, iv) == ("app-password", None)
+
+
+def test_previous_key_tokens_are_rotated(old_token, monkeypatch):
+    password, rotated = decrypt_password_for_rotation(*old_token)
+    assert password == "app-password"
+    monkeypatch.setattr(settings, "PREVIOUS_SECRET_KEYS", None)
+    assert decrypt_password(rotated, old_token[1]) == "app-password"
+    with pytest.raises(ValueError):
+        decrypt_password(*old_token)
+
+
+def test_reading_a_sender_stores_the_rotated_token(old_token, db):
+    token, iv = old_token
+    db.add(UserSecret(id=1, user_id=1, email_provider="custom", email_address="a@test.com",
+                      encrypted_app_password=token, iv=iv))
+    db.commit()
+
+    assert EmailConfigCRUD.get_decrypted_password(db, 1, "custom") == "app-password"
+    db.expire_all()
+    assert db.get(UserSecret, 1).encrypted_app_password != token
+    assert EmailConfigCRUD.rotate_passwords(db) == 0
+
+
+def test_rotate_passwords(old_token, db):
+    token, iv = old_token
+    db.add_all([
+        UserSecret(id=idx, user_id=idx, email_provider="custom", email_address="a@test.com",
+                   encrypted_app_password=token, iv=iv)
+        for idx in (1, 2)
+    ])
+    db.commit()
+    assert EmailConfigCRUD.rotate_passwords(db) == 2
+    assert EmailConfigCRUD.rotate_passwords(db) == 0
@@ -0,0 +1,36 @@
+import json
+import logging
+import queue
+import sys
+
+from app.core.log import JSONFormatter, _DeferredQueueHandler
+
+
+def _queued(record: logging.LogRecord) -> logging.LogRecord:
+    log_queue = queue.SimpleQueue()
+    _DeferredQueueHandler(log_queue).emit(record)
+    return log_queue.get_nowait()
+
+
+def test_message_args_are_resolved_when_logged():
+    items = [1]
+    record = logging.LogRecord("t", logging.INFO, __file__, 1, "items %s", (items,), None)
+    queued = _queued(record)
+    items.append(2)
+    assert queued.getMessage() == "items [1]"
+    assert queued.args is None
+
+
+def test_traceback_is_rendered_when_logged():
+    try:
+        raise ZeroDivisionError("boom")
+    except ZeroDivisionError:
+        record = logging.LogRecord("t", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+    queued = _queued(record)
+    assert queued.exc_info is None
+    assert "ZeroDivisionError: boom" in queued.exc_text
+
+    entry = json.loads(JSONFormatter().format(queued))
+    assert entry["msg"] == "failed"
+    assert "ZeroDivisionError: boom" in entry["exc"]
+    assert "ZeroDivisionError: boom" in logging.Formatter().format(queued)
@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+from app.core.progress import ProgressHub
+
+
+def _publish_from_thread(hub, email_log_id, *events):
+    thread = threading.Thread(target=lambda: [hub.publish(email_log_id, event) for event in events])
+    thread.start()
+    thread.join()
+
+
+def test_events_published_from_a_worker_thread_reach_the_stream():
+    async def scenario():
+        hub = ProgressHub(queue_size=10)
+        subscription = hub.subscribe(1)
+        other = hub.subscribe(2)
+        _publish_from_thread(hub, 1, {"n": 1}, {"n": 2})
+        assert await subscription.get(1) == {"n": 1}
+        assert await subscription.get(1) == {"n": 2}
+        assert await other.get(0.01) is None
+
+    asyncio.run(scenario())
+
+
+def test_unsubscribe_forgets_the_campaign():
+    async def scenario():
+        hub = ProgressHub(queue_size=10)
+        subscription = hub.subscribe(1)
+        assert hub.has_subscribers(1)
+        hub.unsubscribe(subscription)
+        assert not hub.has_subscribers(1)
+        hub.publish(1, {"n": 1})  # Nobody listening: dropped
+
+    asyncio.run(scenario())
+
+
+def test_overflow_drops_queued_events_and_signals_a_resync():
+    async def scenario():
+        hub = ProgressHub(queue_size=1)
+        subscription = hub.subscribe(1)
+        _publish_from_thread(hub, 1, {"n": 1}, {"n": 2}, {"n": 3})
+        await asyncio.sleep(0)  # Let the loop deliver the queued callbacks
+        assert await subscription.get(1) is None
+        assert subscription.queue.empty()
+        _publish_from_thread(hub, 1, {"n": 4})
+        assert await subscription.get(1) == {"n": 4}
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+import math
+from datetime import datetime, timedelta
+
+from app.core.rate_limit import ProviderProfile, next_day_start, plan_deferrals, refill, split_grant
+from app.crud.quota_crud import SenderQuotaCRUD
+from app.models.sender_quota import SenderQuota
+
+MODELS = [SenderQuota]
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+PROFILE = ProviderProfile(per_minute=60, per_day=0, recipients_per_message=100, burst=5)
+UNLIMITED = ProviderProfile(per_minute=0, per_day=0, recipients_per_message=100, burst=1)
+
+
+def test_refill_adds_tokens_at_the_sustained_rate_up_to_burst():
+    assert refill(0.0, 100.0, 102.0, PROFILE) == 2.0
+    assert refill(4.0, 100.0, 200.0, PROFILE) == 5.0
+    # Clock going backwards never removes tokens
+    assert refill(1.0, 100.0, 90.0, PROFILE) == 1.0
+
+
+def test_refill_without_rate_limit_is_always_full():
+    assert math.isinf(refill(0.0, 100.0, 100.0, UNLIMITED))
+
+
+def test_split_grant():
+    assert split_grant(10, 3.7, None) == (3, 3.7 - 3)
+    assert split_grant(2, 5.0, None) == (2, 3.0)
+    assert split_grant(10, -4.0, None) == (0, -4.0)
+    assert split_grant(10, 8.0, 2)[0] == 2
+    assert split_grant(10, 8.0, -1)[0] == 0
+    assert split_grant(10, float("inf"), None)[0] == 10
+
+
+def test_plan_deferrals_spreads_at_the_sustained_rate():
+    times = plan_deferrals(3, 0.0, None, PROFILE, NOW)
+    assert times == [NOW + timedelta(seconds=s) for s in (1, 2, 3)]
+
+
+def test_plan_deferrals_moves_past_daily_quota_to_next_day():
+    times = plan_deferrals(3, 0.0, 1, PROFILE, NOW)
+    assert times[0] == NOW + timedelta(seconds=1)
+    assert times[1:] == [next_day_start(NOW)] * 2
+    assert next_day_start(NOW) == datetime(2026, 1, 2)
+
+
+def test_plan_deferrals_without_rate_limit():
+    # SEND_RATE_PER_MINUTE=0 used to divide by zero
+    assert plan_deferrals(2, 0.0, 0, UNLIMITED, NOW) == [next_day_start(NOW)] * 2
+    assert plan_deferrals(1, 0.0, None, UNLIMITED, NOW) == [NOW]
+
+
+def test_reserve_counts_envelope_recipients_against_the_daily_quota(db):
+    profile = ProviderProfile(per_minute=0, per_day=10, recipients_per_message=100, burst=1)
+    grant = SenderQuotaCRUD.reserve(db, 1, profile, 5, recipients_per_message=3)
+    assert grant.granted == 3
+    assert grant.retry_at == [next_day_start(datetime.utcnow())] * 2
+    assert db.get(SenderQuota, 1).sent_today == 9
+
+
+def test_throttle_pauses_a_sender_without_rate_limit(db):
+    profile = ProviderProfile(per_minute=0, per_day=0, recipients_per_message=100, burst=1)
+    assert SenderQuotaCRUD.reserve(db, 1, profile, 2).granted == 2
+
+    SenderQuotaCRUD.throttle(db, 1, profile, 60)
+    grant = SenderQuotaCRUD.reserve(db, 1, profile, 2)
+    assert grant.granted == 0
+    assert all(retry_at >= datetime.utcnow() + timedelta(seconds=55) for retry_at in grant.retry_at)
+
+
+def test_bucket_starts_empty_after_a_throttle(db):
+    profile = ProviderProfile(per_minute=60, per_day=0, recipients_per_message=100, burst=5)
+    SenderQuotaCRUD.reserve(db, 1, profile, 1)
+    SenderQuotaCRUD.throttle(db, 1, profile, 0)
+    grant = SenderQuotaCRUD.reserve(db, 1, profile, 3)
+    assert grant.granted == 0
+    assert len(grant.retry_at) == 3
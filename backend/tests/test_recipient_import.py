@@ -0,0 +1,41 @@
+import io
+import json
+
+import pytest
+
+from app.core.recipient_import import RecipientImportError, parse_recipient_csv, variable_names
+from app.core.templating import CompiledTemplate
+
+
+def _parse(text: str):
+    columns, batches = parse_recipient_csv(io.BytesIO(text.encode("utf-8")))
+    return columns, list(batches)
+
+
+def test_variable_names_are_ascii_identifiers():
+    names = variable_names(["prénom", "Last Name", "", "2nd", "名前", "prenom"])
+    assert names == ["prenom", "Last_Name", "column2", "_2nd", "column4", "prenom_2"]
+    # Every name can be used as a placeholder
+    for name in names:
+        assert CompiledTemplate("{{%s}}" % name).variables == frozenset({name})
+
+
+def test_parse_counts_invalid_and_duplicate_rows():
+    columns, batches = _parse("Email,Prénom\nann@x.com,Ann\nnot-an-address,X\nANN@x.com,Dup\nbob@X.COM,Bob\n")
+    assert columns == ["Prenom"]
+    entries = [entry for batch in batches for entry in batch.entries]
+    assert [entry["address"] for entry in entries] == ["ann@x.com", "bob@x.com"]
+    assert json.loads(entries[0]["variables"]) == {"Prenom": "Ann"}
+    assert sum(batch.invalid for batch in batches) == 1
+    assert sum(batch.duplicates for batch in batches) == 1
+
+
+def test_parse_without_header():
+    columns, batches = _parse("a@x.com\nb@x.com\n")
+    assert columns == []
+    assert [entry["address"] for batch in batches for entry in batch.entries] == ["a@x.com", "b@x.com"]
+
+
+def test_parse_rejects_files_without_address_column():
+    with pytest.raises(RecipientImportError):
+        _parse("name,city\nAnn,Paris\n")
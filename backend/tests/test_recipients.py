@@ -0,0 +1,25 @@
+from app.core.recipients import address_key, clean_recipients, normalize_address
+
+
+def test_normalize_address_lowercases_the_domain_only():
+    assert normalize_address("  John.Doe@Example.COM ") == "John.Doe@example.com"
+    assert address_key("John.Doe@Example.COM") == "john.doe@example.com"
+
+
+def test_clean_recipients_deduplicates_across_fields():
+    result = clean_recipients(
+        ["a@x.com", "A@X.com", "b@x.com"], cc=["b@x.com", "c@x.com"], bcc=["C@x.com", "d@x.com"]
+    )
+    assert result.to == ["a@x.com", "b@x.com"]
+    assert result.cc == ["c@x.com"]
+    assert result.bcc == ["d@x.com"]
+    assert result.duplicates == 3
+    assert result.suppressed == 0
+
+
+def test_clean_recipients_drops_suppressed():
+    result = clean_recipients(["a@x.com", "B@x.com"], cc=["c@x.com"],
+                              suppressed=frozenset({"b@x.com", "c@x.com"}))
+    assert result.to == ["a@x.com"]
+    assert result.cc == []
+    assert result.suppressed == 2
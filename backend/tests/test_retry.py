@@ -0,0 +1,62 @@
+import smtplib
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.core.retry import (
+    PERMANENT, TRANSIENT, backoff_delay, classify_error, is_hard_bounce,
+    next_attempt_at, throttled_attempt_at
+)
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (smtplib.SMTPRecipientsRefused({"a@x.com": (451, b"try later")}), TRANSIENT),
+    (smtplib.SMTPRecipientsRefused({"a@x.com": (550, b"no such user")}), PERMANENT),
+    (smtplib.SMTPDataError(452, b"insufficient storage"), TRANSIENT),
+    (smtplib.SMTPDataError(554, b"rejected"), PERMANENT),
+    (smtplib.SMTPServerDisconnected("gone"), TRANSIENT),
+    (socket.timeout(), TRANSIENT),
+    (ConnectionResetError(), TRANSIENT),
+    (smtplib.SMTPAuthenticationError(535, b"bad credentials"), PERMANENT),
+    (ValueError("unreadable attachment"), PERMANENT),
+])
+def test_classify_error(exc, expected):
+    assert classify_error(exc) == expected
+
+
+def test_classify_error_prefers_given_code():
+    assert classify_error(ValueError(), smtp_code=421) == TRANSIENT
+
+
+def test_backoff_delay_doubles_and_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "SEND_RETRY_BASE_DELAY", 60)
+    monkeypatch.setattr(settings, "SEND_RETRY_MAX_DELAY", 300)
+    for attempt, delay in [(1, 60), (2, 120), (3, 240), (4, 300), (10, 300)]:
+        for _ in range(20):
+            assert delay / 2 <= backoff_delay(attempt) <= delay
+
+
+def test_next_attempt_at_stops_at_max_attempts(monkeypatch):
+    monkeypatch.setattr(settings, "SEND_MAX_ATTEMPTS", 3)
+    assert next_attempt_at(1, NOW) > NOW
+    assert next_attempt_at(2, NOW) > NOW
+    assert next_attempt_at(3, NOW) is None
+
+
+def test_throttled_attempts_run_out(monkeypatch):
+    # A server answering 421 forever must not keep a delivery queued forever
+    monkeypatch.setattr(settings, "SEND_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "SEND_THROTTLE_BACKOFF", 60)
+    assert throttled_attempt_at(1, NOW) == NOW + timedelta(seconds=60)
+    assert throttled_attempt_at(2, NOW) == NOW + timedelta(seconds=60)
+    assert throttled_attempt_at(3, NOW) is None
+
+
+def test_is_hard_bounce():
+    assert is_hard_bounce(smtplib.SMTPRecipientsRefused({"a@x.com": (550, b"no such user")}))
+    assert not is_hard_bounce(smtplib.SMTPRecipientsRefused({"a@x.com": (451, b"later")}))
+    assert not is_hard_bounce(smtplib.SMTPDataError(550, b"content rejected"))
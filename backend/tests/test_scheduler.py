@@ -0,0 +1,50 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.core.scheduler import DueTimes
+
+
+def test_next_due_skips_past_times_and_duplicates():
+    due = DueTimes()
+    now = datetime.utcnow()
+    soon = now + timedelta(seconds=30)
+    due.refill([now - timedelta(seconds=1), soon, soon, now + timedelta(seconds=60)])
+    assert due.next_due() == soon
+    assert len(due) == 2
+
+
+def test_wait_returns_at_once_when_something_was_added_since():
+    due = DueTimes()
+    generation = due.generation
+    due.add(datetime.utcnow() + timedelta(hours=1))
+    started = time.monotonic()
+    due.wait(generation, max_wait=5)
+    assert time.monotonic() - started < 1
+
+
+def test_wait_ends_at_the_next_due_time():
+    due = DueTimes()
+    due.refill([datetime.utcnow() + timedelta(seconds=0.2)])
+    started = time.monotonic()
+    due.wait(due.generation, max_wait=5)
+    assert 0.1 < time.monotonic() - started < 2
+
+
+def test_earlier_add_wakes_a_waiting_worker():
+    due = DueTimes()
+    due.add(datetime.utcnow() + timedelta(hours=1))
+    woke = threading.Event()
+
+    def worker():
+        due.wait(due.generation, max_wait=5)
+        woke.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    time.sleep(0.1)
+    due.add(datetime.utcnow() + timedelta(hours=2))  # Later: no wake-up
+    assert not woke.wait(0.2)
+    due.add(datetime.utcnow() + timedelta(minutes=1))
+    assert woke.wait(1)
+    thread.join()
@@ -0,0 +1,114 @@
+import base64
+import email
+import smtplib
+
+import pytest
+
+from app.core.smtp_client import SMTPClient
+from app.core.smtp_pool import send_chunks
+
+
+class FakeProtocol:
+    """Answers the SMTP commands send_chunks issues; rcpt replies by address"""
+
+    def __init__(self, rcpt_codes=None):
+        self.rcpt_codes = rcpt_codes or {}
+        self.data = b""
+        self.replies = []
+        self.commands = []
+
+    def ehlo_or_helo_if_needed(self):
+        pass
+
+    def mail(self, from_addr):
+        self.commands.append("mail")
+        return 250, b"OK"
+
+    def rcpt(self, addr):
+        self.commands.append("rcpt")
+        return self.rcpt_codes.get(addr, 250), b"reply"
+
+    def putcmd(self, cmd):
+        self.commands.append(cmd)
+        self.replies.append((354, b"go ahead"))
+
+    def getreply(self):
+        return self.replies.pop(0) if self.replies else (250, b"queued")
+
+    def send(self, chunk):
+        self.data += chunk
+
+    def rset(self):
+        self.commands.append("rset")
+
+    def close(self):
+        pass
+
+
+def _client():
+    return SMTPClient("smtp.test", 587, "sender@test.com", "secret")
+
+
+def test_prepared_message_is_dot_stuffed_once():
+    prepared = _client().prepare_message("Subject", "first\n.hidden line\nlast")
+    chunks, _ = prepared.chunks(["a@test.com"])
+    assert b"\r\n..hidden line" in b"".join(chunks)
+
+    raw, _ = prepared.message_bytes(["a@test.com"])
+    assert b"\r\n.hidden line" in raw
+
+
+def test_prepared_message_headers_are_per_recipient():
+    prepared = _client().prepare_message("Hello", "body", attachments=[{
+        "filename": "a.txt", "content_type": "text/plain",
+        "base64_content": base64.b64encode(b"attached").decode(),
+    }])
+    first, first_id = prepared.message_bytes(["a@test.com"], cc_email=["c@test.com"])
+    second, second_id = prepared.message_bytes(["b@test.com"])
+    assert first_id != second_id
+
+    message = email.message_from_bytes(first)
+    assert message["To"] == "a@test.com" and message["Cc"] == "c@test.com"
+    assert message["Subject"] == "Hello" and message["Message-ID"] == first_id
+    attachment = [part for part in message.walk() if part.get_filename() == "a.txt"][0]
+    assert attachment.get_payload(decode=True) == b"attached"
+    assert email.message_from_bytes(second)["To"] == "b@test.com"
+
+
+def test_templated_message_renders_per_recipient():
+    prepared = _client().prepare_message("Hi {{name}}", "Dear {{name}}", templated=True)
+    raw, _ = prepared.message_bytes(["a@test.com"], variables={"name": "Ann"})
+    message = email.message_from_bytes(raw)
+    assert message["Subject"] == "Hi Ann"
+    text = [part for part in message.walk() if part.get_content_type() == "text/plain"][0]
+    assert text.get_payload(decode=True) == b"Dear Ann"
+
+
+def test_send_chunks_writes_the_chunks_and_terminator():
+    server = FakeProtocol()
+    refused = send_chunks(server, "sender@test.com", ["a@test.com"], [b"Header: x\r\n", b"\r\nbody\r\n"])
+    assert refused == {}
+    assert server.data == b"Header: x\r\n\r\nbody\r\n.\r\n"
+
+
+def test_send_chunks_reports_partially_refused_recipients():
+    server = FakeProtocol({"bad@test.com": 550})
+    refused = send_chunks(server, "sender@test.com", ["a@test.com", "bad@test.com"], [b"x\r\n"])
+    assert list(refused) == ["bad@test.com"]
+    assert server.data.endswith(b".\r\n")
+
+
+def test_send_chunks_raises_when_every_recipient_is_refused():
+    server = FakeProtocol({"bad@test.com": 550})
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        send_chunks(server, "sender@test.com", ["bad@test.com"], [b"x\r\n"])
+    assert server.data == b"" and "rset" in server.commands
+
+
+def test_send_chunks_sends_nothing_when_a_required_recipient_is_refused():
+    server = FakeProtocol({"to@test.com": 550})
+    with pytest.raises(smtplib.SMTPRecipientsRefused) as refused:
+        send_chunks(server, "sender@test.com", ["to@test.com", "cc@test.com"], [b"x\r\n"],
+                    required=["to@test.com"])
+    assert list(refused.value.recipients) == ["to@test.com"]
+    assert server.data == b""
@@ -0,0 +1,110 @@
+import smtplib
+
+import pytest
+
+from app.core.smtp_pool import PooledSMTPConnection, SMTPConnectionPool, SMTPPoolTimeout
+
+
+class FakeServer:
+    """Stands in for an authenticated smtplib.SMTP session"""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.sent = []
+        self.closed = False
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((from_addr, list(to_addrs), msg))
+        return {}
+
+    def noop(self):
+        return 250, b"OK"
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+def _pool(servers=None, **kwargs):
+    """Pool whose sessions are FakeServers (taken from `servers` first, if given)"""
+    pool = SMTPConnectionPool("smtp.test", 587, "sender@test.com", "secret", **kwargs)
+    pool.opened = []
+
+    def connect():
+        server = servers.pop(0) if servers else FakeServer()
+        pool.opened.append(server)
+        return PooledSMTPConnection(server)
+
+    pool._connect = connect
+    return pool
+
+
+def test_released_sessions_are_reused():
+    pool = _pool(max_sessions=2)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert len(pool.opened) == 1
+
+
+def test_acquire_times_out_when_every_session_is_checked_out():
+    pool = _pool(max_sessions=2)
+    pool.acquire()
+    pool.acquire()
+    with pytest.raises(SMTPPoolTimeout):
+        pool.acquire(timeout=0.05)
+
+
+def test_spent_sessions_are_closed_on_release():
+    pool = _pool(max_sessions=1, max_messages_per_session=2)
+    conn = pool.acquire()
+    conn.messages_sent = 2
+    pool.release(conn)
+    assert conn.server.closed
+    assert pool.acquire() is not conn
+
+
+def test_resize_closes_extra_sessions_as_they_come_back():
+    pool = _pool(max_sessions=2)
+    first, second = pool.acquire(), pool.acquire()
+    pool.resize(1)
+    pool.release(first)
+    pool.release(second)
+    assert first.server.closed and not second.server.closed
+    assert pool.acquire() is second
+
+
+def test_close_all_closes_idle_sessions():
+    pool = _pool(max_sessions=2)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.close_all()
+    assert first.server.closed and not second.server.closed
+    # The closed session's slot is free again
+    assert pool.acquire() is not first
+
+
+def test_sendmail_retries_once_on_a_fresh_session_after_421():
+    broken = FakeServer(failures=[smtplib.SMTPDataError(421, b"closing channel")])
+    pool = _pool([broken], max_sessions=1)
+    assert pool.sendmail("sender@test.com", ["a@test.com"], b"msg") == {}
+    assert broken.closed
+    assert len(pool.opened) == 2 and pool.opened[1].sent
+
+
+def test_sendmail_gives_up_after_the_retry():
+    pool = _pool([FakeServer(failures=[smtplib.SMTPServerDisconnected()]),
+                  FakeServer(failures=[smtplib.SMTPServerDisconnected()])], max_sessions=1)
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        pool.sendmail("sender@test.com", ["a@test.com"], b"msg")
+
+
+def test_permanent_errors_are_not_retried():
+    pool = _pool([FakeServer(failures=[smtplib.SMTPDataError(554, b"rejected")])], max_sessions=1)
+    with pytest.raises(smtplib.SMTPDataError):
+        pool.sendmail("sender@test.com", ["a@test.com"], b"msg")
+    assert len(pool.opened) == 1
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.crud.status_buffer import StatusWriteBuffer
+from app.models.email_delivery import EmailDelivery
+
+MODELS = [EmailDelivery]
+
+
+@pytest.fixture
+def deliveries(db):
+    db.add_all([
+        EmailDelivery(id=idx, email_log_id=1, user_id=1, recipient=f"r{idx}@x.com",
+                      status="sending", attempts=1, available_at=datetime(2026, 1, 1))
+        for idx in range(1, 4)
+    ])
+    db.commit()
+    return db
+
+
+def _statuses(db):
+    db.rollback()  # New snapshot after the buffer's own commits
+    return dict(db.query(EmailDelivery.id, EmailDelivery.status).order_by(EmailDelivery.id).all())
+
+
+def test_flush_writes_merged_updates(deliveries, session_factory):
+    writes = StatusWriteBuffer(EmailDelivery, session_factory, max_pending=10, max_delay=60)
+    writes.add({"id": 1, "status": "queued", "smtp_code": 421})
+    writes.add({"id": 1, "status": "sent"})
+    writes.add({"id": 2, "status": "failed", "smtp_code": 550})
+    assert len(writes) == 2
+    assert _statuses(deliveries) == {1: "sending", 2: "sending", 3: "sending"}
+
+    assert writes.flush() == 2
+    assert len(writes) == 0
+    assert _statuses(deliveries) == {1: "sent", 2: "failed", 3: "sending"}
+    assert deliveries.get(EmailDelivery, 1).smtp_code == 421
+    assert writes.flushes == 1 and writes.rows_written == 2
+
+
+def test_add_flushes_when_full(deliveries, session_factory):
+    writes = StatusWriteBuffer(EmailDelivery, session_factory, max_pending=2, max_delay=60)
+    writes.add({"id": 1, "status": "sent"})
+    writes.add({"id": 2, "status": "sent"})
+    assert len(writes) == 0
+    assert _statuses(deliveries) == {1: "sent", 2: "sent", 3: "sending"}
+
+
+def test_add_flushes_when_oldest_is_due(deliveries, session_factory):
+    writes = StatusWriteBuffer(EmailDelivery, session_factory, max_pending=10, max_delay=0)
+    writes.add({"id": 3, "status": "sent"})
+    assert _statuses(deliveries)[3] == "sent"
+
+
+def test_failed_flush_keeps_updates_pending(deliveries, session_factory):
+    writes = StatusWriteBuffer(EmailDelivery, session_factory, max_pending=10, max_delay=60)
+    writes.add({"id": 1, "recipient": None})  # NOT NULL
+    with pytest.raises(IntegrityError):
+        writes.flush()
+    assert len(writes) == 1
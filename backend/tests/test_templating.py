@@ -0,0 +1,29 @@
+from app.core.templating import CompiledTemplate, compile_template, header_safe, missing_variables
+
+
+def test_render_fills_placeholders():
+    template = CompiledTemplate("Hi {{ name }}, your code is {{code}}.")
+    assert template.variables == frozenset({"name", "code"})
+    assert template.render({"name": "Ann", "code": "42"}) == "Hi Ann, your code is 42."
+    assert template.render({"name": "Ann"}) == "Hi Ann, your code is ."
+
+
+def test_render_escapes_html_when_asked():
+    template = CompiledTemplate("<p>{{name}}</p>")
+    assert template.render({"name": "<b>&"}, escape_html=True) == "<p>&lt;b&gt;&amp;</p>"
+    assert template.render({"name": "<b>"}) == "<p><b></p>"
+
+
+def test_text_without_placeholders_is_returned_as_is():
+    template = CompiledTemplate("Plain {text} and {{ not valid }}")
+    assert template.variables == frozenset()
+    assert template.render({}) == "Plain {text} and {{ not valid }}"
+
+
+def test_compile_template_is_cached():
+    assert compile_template("Hello {{x}}") is compile_template("Hello {{x}}")
+
+
+def test_missing_variables_and_header_safe():
+    assert missing_variables(frozenset({"a", "b"}), {"a": "1"}) == frozenset({"b"})
+    assert header_safe({"s": "line1\nline2"}) == {"s": "line1 line2"}
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from app.core.dependencies import get_current_user_async
+from app.core.security import create_access_token
+from app.crud.user import get_cached_user, user_cache
+from app.models.user import User
+
+MODELS = [User]
+
+
+class RunSync:
+    """The part of AsyncSession get_current_user_async uses, over a sync session"""
+
+    def __init__(self, db):
+        self.db = db
+        self.calls = 0
+
+    async def run_sync(self, fn, *args):
+        self.calls += 1
+        return fn(self.db, *args)
+
+
+@pytest.fixture
+def user(db):
+    user_cache.clear()
+    user = User(id=1, name="Ann", email="ann@test.com", hashed_password="x", status="active")
+    db.add(user)
+    db.commit()
+    yield user
+    user_cache.clear()
+
+
+def test_async_lookup_counts_one_miss_then_hits(user, db):
+    token = create_access_token({"sub": str(user.id)})
+    session = RunSync(db)
+    misses, hits = user_cache.misses, user_cache.hits
+
+    assert asyncio.run(get_current_user_async(token, session)).email == "ann@test.com"
+    assert asyncio.run(get_current_user_async(token, session)).email == "ann@test.com"
+    assert user_cache.misses - misses == 1
+    assert user_cache.hits - hits == 1
+    assert session.calls == 1
+
+
+def test_orm_updates_drop_the_cached_user(user, db):
+    assert get_cached_user(db, user.id).status == "active"
+    user.status = "blocked"
+    db.commit()
+    assert get_cached_user(db, user.id).status == "blocked"